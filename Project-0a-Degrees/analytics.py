@@ -0,0 +1,130 @@
+"""
+Graph-wide degrees of separation statistics.
+
+Runs a full BFS from each of a set of source people, spread over a pool of
+worker processes, and streams one CSV row per source as it finishes:
+
+    person_id, name, reachable, mean, eccentricity, closeness, histogram
+
+where `histogram` lists how many people are 1, 2, 3, ... steps away.
+Sources are a random sample of the largest connected component unless
+given explicitly, so mean distances over the sample estimate the
+component's average degrees of separation. Summary statistics and the most
+central sources (highest closeness) are printed at the end.
+
+Usage: python analytics.py results.csv [--samples N] [--seed S]
+                           [--source NAME ...] [--processes N] [directory]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import os
+import random
+import sys
+
+import degrees
+
+FIELDS = ["person_id", "name", "reachable", "mean", "eccentricity",
+          "closeness", "histogram"]
+
+
+def source_stats(source):
+    """
+    Returns separation statistics for one person index.
+    """
+    graph = degrees.graph
+    histogram = [len(layer) for layer in graph.layers(source)][1:]
+    reachable = sum(histogram)
+    total = sum(depth * count for depth, count in enumerate(histogram, 1))
+    return {
+        "person_id": graph.person_ids[source],
+        "name": graph.person_names[source],
+        "reachable": reachable,
+        "mean": total / reachable if reachable else 0,
+        "eccentricity": len(histogram),
+        "closeness": reachable / total if total else 0,
+        "histogram": histogram
+    }
+
+
+def sample_sources(count, seed):
+    """
+    Returns `count` random person indices from the largest component.
+    """
+    components = degrees.components
+    label, _ = components.largest(1)[0]
+    members = components.members(label)
+    return random.Random(seed).sample(members, min(count, len(members)))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python analytics.py results.csv [--samples N] [--seed S] "
+              "[--source NAME ...] [--processes N] [directory]")
+    parser.add_argument("results")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--samples", type=int, default=100,
+                        help="sources to sample from the largest component")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--source", action="append", default=[],
+                        help="person id or name to use as a source")
+    parser.add_argument("--processes", type=int, default=os.cpu_count(),
+                        help="worker processes to spread sources over")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of most central sources to list")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, cache=True)
+    print("Data loaded.", file=sys.stderr)
+
+    if args.source:
+        try:
+            sources = [degrees.graph.person_index[degrees.resolve_person(name)]
+                       for name in args.source]
+        except ValueError as e:
+            sys.exit(str(e))
+    else:
+        sources = sample_sources(args.samples, args.seed)
+
+    # Separation counts summed over every source, by distance
+    totals = []
+    results = []
+    with open(args.results, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+
+        # Fork after loading so every worker inherits the graph
+        context = multiprocessing.get_context("fork")
+        with context.Pool(max(1, args.processes)) as pool:
+            for stats in pool.imap_unordered(source_stats, sources):
+                results.append(stats)
+                for depth, count in enumerate(stats["histogram"]):
+                    if depth == len(totals):
+                        totals.append(0)
+                    totals[depth] += count
+                writer.writerow(dict(
+                    stats, histogram=";".join(map(str, stats["histogram"]))))
+                f.flush()
+                print(f"{len(results)}/{len(sources)} sources",
+                      file=sys.stderr)
+
+    pairs = sum(totals)
+    if pairs:
+        mean = sum(depth * count for depth, count in enumerate(totals, 1))
+        print(f"Average degrees of separation: {mean / pairs:.3f} "
+              f"over {pairs} reachable pairs.")
+        print(f"Largest eccentricity: {len(totals)}.")
+        for depth, count in enumerate(totals, 1):
+            print(f"{depth} degrees: {count / pairs:.2%}")
+
+    print("Most central sources:")
+    results.sort(key=lambda stats: -stats["closeness"])
+    for stats in results[:args.top]:
+        print(f"{stats['name']} ({stats['person_id']}): "
+              f"mean {stats['mean']:.3f}, reaches {stats['reachable']}")
+
+
+if __name__ == "__main__":
+    main()
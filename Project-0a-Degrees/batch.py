@@ -0,0 +1,117 @@
+"""
+Batch degrees of separation for many source/target pairs.
+
+Reads a CSV with `source` and `target` columns (IMDB person ids or
+unambiguous names) and writes one CSV row per pair with its degrees and
+path, in input order. Pairs sharing a source are answered from a single
+BFS tree grown from that source, and groups can be spread across a pool
+of worker processes.
+
+Usage: python batch.py pairs.csv results.csv [--processes N] [directory]
+"""
+
+import argparse
+import csv
+import multiprocessing
+import sys
+
+import degrees
+
+FIELDS = ["source", "target", "source_id", "target_id",
+          "degrees", "path", "error"]
+
+
+def format_path(path):
+    """Formats a path as space-separated movie_id:person_id steps."""
+    return " ".join(f"{movie_id}:{person_id}" for movie_id, person_id in path)
+
+
+def read_pairs(filename):
+    """
+    Returns a list of result rows, one per pair, with ids resolved
+    where possible and an error recorded otherwise.
+    """
+    rows = []
+    with open(filename, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for pair in reader:
+            row = dict.fromkeys(FIELDS, "")
+            row["source"], row["target"] = pair["source"], pair["target"]
+            try:
+                row["source_id"] = degrees.resolve_person(pair["source"])
+                row["target_id"] = degrees.resolve_person(pair["target"])
+            except ValueError as e:
+                row["error"] = str(e)
+            rows.append(row)
+    return rows
+
+
+def group_by_source(rows):
+    """
+    Returns a list of (source_id, [target_id, ...]) groups
+    covering every resolved row.
+    """
+    groups = {}
+    for row in rows:
+        if not row["error"]:
+            targets = groups.setdefault(row["source_id"], [])
+            if row["target_id"] not in targets:
+                targets.append(row["target_id"])
+    return list(groups.items())
+
+
+def answer_group(group):
+    """
+    Returns (source_id, {target_id: path}) for one source group.
+    """
+    source, targets = group
+    return source, degrees.shortest_paths_from(source, targets)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python batch.py pairs.csv results.csv "
+              "[--processes N] [directory]")
+    parser.add_argument("pairs")
+    parser.add_argument("results")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="worker processes to spread source groups over")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, cache=True)
+    print("Data loaded.", file=sys.stderr)
+
+    rows = read_pairs(args.pairs)
+    groups = group_by_source(rows)
+    print(f"{len(rows)} pairs, {len(groups)} sources.", file=sys.stderr)
+
+    # Maps source_id -> {target_id: path}
+    answers = {}
+    if args.processes > 1:
+        # Fork after loading so every worker inherits the graph
+        context = multiprocessing.get_context("fork")
+        with context.Pool(args.processes) as pool:
+            for source, paths in pool.imap_unordered(answer_group, groups):
+                answers[source] = paths
+    else:
+        for source, paths in map(answer_group, groups):
+            answers[source] = paths
+
+    with open(args.results, "w", encoding="utf-8", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        for row in rows:
+            if not row["error"]:
+                path = answers[row["source_id"]][row["target_id"]]
+                if path is None:
+                    row["error"] = "not connected"
+                else:
+                    row["degrees"] = len(path)
+                    row["path"] = format_path(path)
+            writer.writerow(row)
+
+
+if __name__ == "__main__":
+    main()
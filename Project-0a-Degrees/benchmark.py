@@ -0,0 +1,324 @@
+"""
+Benchmarks for degrees.py.
+
+Loads each data directory with each storage mode in a fresh process and
+reports load time and peak resident memory, so the modes can be compared
+without one's allocations inflating another's numbers.
+
+Each process then runs the same seeded query pairs, chosen once per
+directory from its BFS layers and components:
+
+    short         people one or two steps apart
+    long          a person and someone in their deepest BFS layer
+    disconnected  people in different components
+
+and reports latency percentiles and the mean number of people expanded
+per search, plus the latency of neighbors_for_person on the query people.
+With --profile, each process also prints the top of a cProfile or
+tracemalloc report covering the load and every query.
+
+Usage: python benchmark.py [--modes dict,compact,cache] [--queries N]
+                           [--seed S] [--searches bfs,bidirectional]
+                           [--profile cprofile|tracemalloc] [directory ...]
+"""
+
+import argparse
+import cProfile
+import io
+import json
+import math
+import pstats
+import random
+import resource
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import degrees
+
+MODES = {
+    "dict": {},
+    "compact": {"compact": True},
+    "cache": {"cache": True}
+}
+
+# Search functions in degrees, by the name given with --searches
+SEARCHES = {
+    "bfs": "shortest_path",
+    "bidirectional": "shortest_path_bidirectional"
+}
+
+CATEGORIES = ("short", "long", "disconnected")
+
+# Number of lines of each profile report to print
+PROFILE_LINES = 25
+
+
+def peak_rss():
+    """Returns this process's peak resident set size in megabytes."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+
+def percentile(values, fraction):
+    """Returns the nearest-rank percentile of a non-empty list."""
+    values = sorted(values)
+    return values[max(0, math.ceil(fraction * len(values)) - 1)]
+
+
+def select_queries(directory, count, seed):
+    """
+    Returns a dict mapping each category to up to `count` seeded
+    (source_id, target_id) pairs for the data in `directory`.
+    """
+    degrees.load_data(directory, cache=True)
+    graph, components = degrees.graph, degrees.components
+    rng = random.Random(seed)
+    label, _ = components.largest(1)[0]
+    members = components.members(label)
+    in_largest = set(members)
+    others = [person for person in range(len(components.labels))
+              if person not in in_largest]
+
+    queries = {category: [] for category in CATEGORIES}
+    for source in rng.sample(members, min(count, len(members))):
+        layers = list(graph.layers(source))
+        if len(layers) < 2:
+            continue
+        near = rng.choice(layers[1:3])
+        queries["short"].append((source, rng.choice(near)))
+        queries["long"].append((source, rng.choice(layers[-1])))
+    if others:
+        for _ in range(count):
+            queries["disconnected"].append(
+                (rng.choice(others), rng.choice(members)))
+
+    ids = graph.person_ids
+    return {category: [(ids[source], ids[target]) for source, target in pairs]
+            for category, pairs in queries.items()}
+
+
+def measure_load(mode, directory):
+    """
+    Loads `directory` in this process and returns its load statistics.
+    """
+    start = time.perf_counter()
+    degrees.load_data(directory, **MODES[mode])
+    return {
+        "mode": mode,
+        "directory": directory,
+        "seconds": time.perf_counter() - start,
+        "peak_mb": peak_rss(),
+        "people": len(degrees.people),
+        "movies": len(degrees.movies),
+        "missing_stars": degrees.missing_stars
+    }
+
+
+def count_expanded(search, source, target):
+    """
+    Runs a search again, counting the people whose movies it scans.
+    """
+    expanded = 0
+    graph = degrees.graph
+    if graph is not None:
+        movies_of = graph.movies_of
+
+        def counted(person):
+            nonlocal expanded
+            expanded += 1
+            return movies_of(person)
+
+        # An instance attribute shadows the method for this search only
+        graph.movies_of = counted
+        try:
+            search(source, target)
+        finally:
+            del graph.movies_of
+    else:
+        unexpanded_neighbors = degrees.unexpanded_neighbors
+
+        def counted(person_id, movies_seen):
+            nonlocal expanded
+            expanded += 1
+            return unexpanded_neighbors(person_id, movies_seen)
+
+        degrees.unexpanded_neighbors = counted
+        try:
+            search(source, target)
+        finally:
+            degrees.unexpanded_neighbors = unexpanded_neighbors
+    return expanded
+
+
+def summarize(name, category, latencies, expanded=None):
+    """Returns a result row for one search and category."""
+    return {
+        "search": name,
+        "category": category,
+        "queries": len(latencies),
+        "p50_ms": percentile(latencies, 0.5) * 1000,
+        "p90_ms": percentile(latencies, 0.9) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "max_ms": max(latencies) * 1000,
+        "expanded": (sum(expanded) / len(expanded)
+                     if expanded is not None else None)
+    }
+
+
+def measure_queries(queries, searches):
+    """
+    Times every query with each search, then reruns each one to count
+    the people it expands, so counting does not inflate the timings.
+    Returns a list of result rows.
+    """
+    rows = []
+    for name in searches:
+        search = getattr(degrees, SEARCHES[name])
+        for category in CATEGORIES:
+            pairs = queries.get(category, [])
+            if not pairs:
+                continue
+            latencies = []
+            for source, target in pairs:
+                start = time.perf_counter()
+                search(source, target)
+                latencies.append(time.perf_counter() - start)
+            expanded = [count_expanded(search, source, target)
+                        for source, target in pairs]
+            rows.append(summarize(name, category, latencies, expanded))
+
+    # Neighbor lookups for every person in the queries
+    people = {person for pairs in queries.values()
+              for pair in pairs for person in pair}
+    latencies = []
+    for person_id in people:
+        start = time.perf_counter()
+        degrees.neighbors_for_person(person_id)
+        latencies.append(time.perf_counter() - start)
+    if latencies:
+        rows.append(summarize("neighbors", "queried", latencies))
+    return rows
+
+
+def run_profiled(profile, function, *args):
+    """
+    Calls function(*args) under cProfile or tracemalloc, as named by
+    `profile`. Returns its result and the top of the report as text.
+    """
+    report = io.StringIO()
+    if profile == "cprofile":
+        profiler = cProfile.Profile()
+        result = profiler.runcall(function, *args)
+        stats = pstats.Stats(profiler, stream=report)
+        stats.sort_stats("cumulative").print_stats(PROFILE_LINES)
+    else:
+        tracemalloc.start()
+        result = function(*args)
+        snapshot = tracemalloc.take_snapshot()
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"Peak traced memory: {peak / (1024 * 1024):.1f} MB",
+              file=report)
+        for stat in snapshot.statistics("lineno")[:PROFILE_LINES]:
+            print(stat, file=report)
+    return result, report.getvalue()
+
+
+def run_child(*args, input=None):
+    """
+    Runs this script with `args` in a fresh interpreter, passing it
+    `input` on stdin, and returns the JSON it prints.
+    """
+    output = subprocess.run([sys.executable, __file__, *args], input=input,
+                            check=True, capture_output=True, text=True)
+    return json.loads(output.stdout)
+
+
+def child(mode, directory, searches, profile):
+    """
+    Loads `directory` and runs the queries read from stdin,
+    printing the results as JSON.
+    """
+    queries = json.load(sys.stdin)
+
+    def run():
+        return measure_load(mode, directory), measure_queries(queries,
+                                                              searches)
+
+    if profile:
+        (load, rows), report = run_profiled(profile, run)
+    else:
+        (load, rows), report = run(), None
+    print(json.dumps({"load": load, "queries": rows, "profile": report}))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--modes dict,compact,cache] "
+              "[--queries N] [--seed S] [--searches bfs,bidirectional] "
+              "[--profile cprofile|tracemalloc] [directory ...]")
+    parser.add_argument("directories", nargs="*", default=["small", "large"])
+    parser.add_argument("--modes", default=",".join(MODES),
+                        help="comma-separated storage modes to load")
+    parser.add_argument("--queries", type=int, default=10,
+                        help="query pairs per category (0 to only load)")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="seed for choosing query pairs")
+    parser.add_argument("--searches", default=",".join(SEARCHES),
+                        help="comma-separated searches to time")
+    parser.add_argument("--profile", choices=["cprofile", "tracemalloc"],
+                        help="print a profile of each load and its queries")
+    parser.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    searches = args.searches.split(",")
+
+    if args.child:
+        child(*args.child, searches, args.profile)
+        return
+
+    for directory in args.directories:
+        queries = {}
+        if args.queries > 0:
+            queries = select_queries(directory, args.queries, args.seed)
+        print(f"{'directory':<12}{'mode':<10}{'load (s)':>10}{'peak MB':>10}"
+              f"{'missing stars':>15}")
+        results = []
+        for mode in args.modes.split(","):
+            child_args = ["--child", mode, directory, "--searches",
+                          args.searches]
+            if args.profile:
+                child_args += ["--profile", args.profile]
+            result = run_child(*child_args, input=json.dumps(queries))
+            stats = result["load"]
+            print(f"{directory:<12}{mode:<10}{stats['seconds']:>10.3f}"
+                  f"{stats['peak_mb']:>10.1f}{stats['missing_stars']:>15}")
+            results.append((mode, result))
+
+        if queries:
+            print()
+            print(f"{'mode':<10}{'search':<15}{'category':<14}{'queries':>8}"
+                  f"{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}"
+                  f"{'max ms':>10}{'expanded':>10}")
+            for mode, result in results:
+                for row in result["queries"]:
+                    expanded = ("" if row["expanded"] is None
+                                else f"{row['expanded']:.0f}")
+                    print(f"{mode:<10}{row['search']:<15}"
+                          f"{row['category']:<14}{row['queries']:>8}"
+                          f"{row['p50_ms']:>10.3f}{row['p90_ms']:>10.3f}"
+                          f"{row['p99_ms']:>10.3f}{row['max_ms']:>10.3f}"
+                          f"{expanded:>10}")
+
+        for mode, result in results:
+            if result["profile"]:
+                print()
+                print(f"Profile of {directory} ({mode}):")
+                print(result["profile"])
+        print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+"""
+Connected-component index for the Degrees graph.
+
+Every person is labelled with the component they belong to, once, and the
+labels are persisted in a snapshot next to the CSVs. Two people are
+connected exactly when their labels match, so degrees.py can answer
+"Not connected." without exploring the source's whole component.
+
+People and stars added to a loaded graph are handled incrementally: a new
+person gets a component of their own, and a star joining two components
+merges the smaller label into the larger one, union-find style, without
+relabelling anybody.
+
+Usage: python components.py [--top N] [directory]
+"""
+
+import argparse
+import os
+from array import array
+
+from graph import load_cached_graph
+from snapshot import (Overlay, read_fresh, save_cache, signature,
+                      write_snapshot)
+
+# File written next to the CSVs holding the component labels
+SNAPSHOT = "components.snapshot"
+
+
+class Components():
+    """
+    Component label of each person index, plus the size of each component.
+    Labels merged into another component have size 0.
+    """
+
+    def __init__(self, labels, sizes):
+        self.labels = labels
+        self.sizes = sizes
+
+        # Maps labels merged by later updates -> the label they joined
+        self.merged = {}
+
+    def find(self, label):
+        """Returns the label a component has been merged into, if any."""
+        merged = self.merged
+        root = label
+        while root in merged:
+            root = merged[root]
+        while label != root:
+            merged[label], label = root, merged[label]
+        return root
+
+    def connected(self, source, target):
+        """Returns True if two person indices are in the same component."""
+        return self.find(self.labels[source]) == self.find(self.labels[target])
+
+    def size(self, person):
+        """Returns the number of people in a person's component."""
+        return self.sizes[self.find(self.labels[person])]
+
+    def count(self):
+        """Returns the number of components."""
+        return sum(1 for size in self.sizes if size)
+
+    def largest(self, n):
+        """Returns (label, size) pairs for the n largest components."""
+        order = sorted(range(len(self.sizes)), key=lambda c: -self.sizes[c])
+        return [(label, self.sizes[label]) for label in order[:n]]
+
+    def members(self, label):
+        """Returns the person indices in a component, in index order."""
+        find = self.find
+        return [person for person, person_label in enumerate(self.labels)
+                if find(person_label) == label]
+
+    def make_writable(self):
+        """Wraps the labels and sizes in Overlays, once."""
+        if not isinstance(self.labels, Overlay):
+            self.labels = Overlay(self.labels)
+            self.sizes = Overlay(self.sizes)
+
+    def add_person(self):
+        """Gives the next person index a component of their own."""
+        self.make_writable()
+        self.labels.append(len(self.sizes))
+        self.sizes.append(1)
+
+    def union(self, source, target):
+        """
+        Merges the components of two person indices.
+        Returns True if they were not already connected.
+        """
+        a = self.find(self.labels[source])
+        b = self.find(self.labels[target])
+        if a == b:
+            return False
+        self.make_writable()
+        if self.sizes[a] < self.sizes[b]:
+            a, b = b, a
+        self.merged[b] = a
+        self.sizes[a] += self.sizes[b]
+        self.sizes[b] = 0
+        return True
+
+
+def label_components(graph):
+    """
+    Labels every person by BFS, expanding each movie's cast once.
+    """
+    labels = array("i", [-1]) * len(graph.person_ids)
+    sizes = array("i")
+    movies_seen = bytearray(len(graph.movie_ids))
+    for start in range(len(labels)):
+        if labels[start] >= 0:
+            continue
+        label = len(sizes)
+        labels[start] = label
+        size = 1
+        layer = [start]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for movie in graph.movies_of(person):
+                    if movies_seen[movie]:
+                        continue
+                    movies_seen[movie] = 1
+                    for co_star in graph.stars_of(movie):
+                        if labels[co_star] < 0:
+                            labels[co_star] = label
+                            size += 1
+                            next_layer.append(co_star)
+            layer = next_layer
+        sizes.append(size)
+    return Components(labels, sizes)
+
+
+def save_components(components, directory):
+    """
+    Writes the component labels to a snapshot next to the CSVs.
+    """
+    labels = array("i", map(components.find, components.labels))
+    write_snapshot(os.path.join(directory, SNAPSHOT),
+                   {"signature": signature(directory)},
+                   {"labels": labels, "sizes": array("i", components.sizes)})
+
+
+def read_components(directory, expected=None):
+    """
+    Returns the Components persisted in `directory`, or None if there is
+    no snapshot or the CSVs have changed since (or it was not written for
+    CSVs with signature `expected`, if given).
+    """
+    snapshot = read_fresh(os.path.join(directory, SNAPSHOT), directory,
+                          expected)
+    if snapshot is None:
+        return None
+    _, sections = snapshot
+    return Components(sections["labels"], sections["sizes"])
+
+
+def load_cached_components(graph, directory):
+    """
+    Returns the persisted Components for `directory`, labelling the graph
+    and writing a fresh snapshot first if needed.
+    """
+    components = read_components(directory)
+    if components is not None:
+        return components
+
+    components = label_components(graph)
+    save_cache(save_components, components, directory)
+    return components
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python components.py [--top N] [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--top", type=int, default=10,
+                        help="number of largest components to list")
+    args = parser.parse_args()
+
+    graph = load_cached_graph(args.directory)
+    components = load_cached_components(graph, args.directory)
+    print(f"{components.count()} components "
+          f"over {len(components.labels)} people.")
+    for label, size in components.largest(args.top):
+        print(f"Component {label}: {size} people")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,18 @@
-import csv
+import argparse
+import os
 import sys
+import time
+from bisect import bisect_left, insort
 
+from components import (load_cached_components, read_components,
+                        save_components)
+from graph import (MASK_CACHE_SIZE, SNAPSHOT, MoviesView, NamesView,
+                   PeopleView, append_rows, fold_updates, load_cached_graph,
+                   load_graph, read_columns, read_graph, save_graph)
+from nameindex import (SortedKeys, build_name_index, load_cached_name_index,
+                       read_name_index)
+from snapshot import (clear_updates, log_update, read_updates, save_cache,
+                      signature, snapshot_signature)
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,57 +24,354 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Sorted (year, movie_id) pairs, with unknown years as 0, so a year filter
+# in dict mode finds the movies outside its range by bisection
+movie_years = []
 
-def load_data(directory):
+# Maps (min_year, max_year) -> movie_ids outside that range in dict mode,
+# for the most recently used ranges
+year_exclusions = {}
+
+# Compact integer-indexed Graph; when loaded, the dicts above become views of it
+graph = None
+
+# Components of the Graph, persisted alongside it when it is cached
+components = None
+
+# NameIndex for prefix completion and suggestions, built on first use
+# unless it is cached alongside the Graph
+name_index = None
+
+# Number of stars rows skipped by load_data for referencing missing ids
+missing_stars = 0
+
+# The CSV files and the columns read from each
+CSV_COLUMNS = (("people.csv", ("id", "name", "birth")),
+               ("movies.csv", ("id", "title", "year")),
+               ("stars.csv", ("person_id", "movie_id")))
+
+# Signature of the CSVs the loaded snapshots were written for, when cached;
+# rows logged since then are replayed over the snapshots on load
+cached_signature = None
+
+# Rows in the update log; past COMPACT_AFTER the snapshots are rewritten
+logged_rows = 0
+COMPACT_AFTER = 100000
+
+# Rows applied by update_data but not yet appended to the CSVs,
+# by CSV file name
+unsaved = {filename: [] for filename, _ in CSV_COLUMNS}
+
+
+def load_data(directory, compact=False, cache=False):
     """
     Load data from CSV files into memory.
+
+    With `compact`, the data is stored as a CSR Graph instead, and
+    `names`, `people` and `movies` become read-only views of it.
+    With `cache` (which implies `compact`), the Graph is memory-mapped from
+    a snapshot next to the CSVs, written on first load and rewritten
+    whenever a CSV's size or modification time changes, and so is an index
+    of its connected components used to reject disconnected pairs at once.
+    Rows that update_data appended to the CSVs since are instead replayed
+    from its log over the snapshots. The trigram index of names used for
+    suggestions is cached next to the CSVs in both cached and dict modes.
     """
+    global graph, components, name_index, names, people, movies, missing_stars
+    global movie_years, cached_signature, logged_rows
+    components = None
+    name_index = None
+    movie_years = []
+    year_exclusions.clear()
+    cached_signature = None
+    logged_rows = 0
+    for rows in unsaved.values():
+        rows.clear()
+    if compact or cache:
+        updates = []
+        snapshots = read_snapshots(directory) if cache else None
+        if snapshots is not None:
+            (cached_signature, graph, components, name_index,
+             updates) = snapshots
+        else:
+            graph = (load_cached_graph(directory) if cache
+                     else load_graph(directory))
+        if cache and snapshots is None:
+            components = load_cached_components(graph, directory)
+            name_index = load_cached_name_index(
+                SortedKeys(graph.name_index), directory)
+            cached_signature = signature(directory)
+            save_cache(clear_updates, directory)
+        missing_stars = graph.missing_stars
+        names = NamesView(graph)
+        people = PeopleView(graph)
+        movies = MoviesView(graph)
+        for rows in updates:
+            apply_rows(rows)
+            logged_rows += sum(map(len, rows.values()))
+        return
+    if graph is not None:
+        graph = None
+        names, people, movies = {}, {}, {}
+    missing_stars = 0
+
     # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            lname = row["name"].lower()
-            if lname not in names:
-                names[lname] = {row["id"]}
-            else:
-                names[lname].add(row["id"])
+    for person_id, name, birth in read_columns(
+            f"{directory}/people.csv", "id", "name", "birth"):
+        people[person_id] = {
+            "name": name,
+            "birth": birth,
+            "movies": set()
+        }
+        lname = name.lower()
+        if lname not in names:
+            names[lname] = {person_id}
+        else:
+            names[lname].add(person_id)
 
     # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                # Ignore rows referencing missing people/movies
-                pass
+    for movie_id, title, year in read_columns(
+            f"{directory}/movies.csv", "id", "title", "year"):
+        movies[movie_id] = {
+            "title": title,
+            "year": year,
+            "stars": set()
+        }
+        movie_years.append((int(year) if year.isdigit() else 0, movie_id))
+    movie_years.sort()
+
+    # Load stars, counting rows that reference missing people/movies
+    for person_id, movie_id in read_columns(
+            f"{directory}/stars.csv", "person_id", "movie_id"):
+        if person_id in people and movie_id in movies:
+            people[person_id]["movies"].add(movie_id)
+            movies[movie_id]["stars"].add(person_id)
+        else:
+            missing_stars += 1
+
+    # Index names for completion and suggestions, cached like the Graph's
+    name_index = load_cached_name_index(name_keys(), directory)
+
+
+def read_snapshots(directory):
+    """
+    Returns (signature, graph, components, name_index, updates) from the
+    snapshots in `directory`: the signature of the CSVs they were written
+    for, the loaded indexes, and the rows of each update logged since.
+    Returns None unless every snapshot was written for the same CSVs and
+    the log leads from those to the CSVs as they are now.
+    """
+    base = snapshot_signature(os.path.join(directory, SNAPSHOT))
+    updates = None if base is None else read_updates(directory, base)
+    if updates is None:
+        return None
+    snapshot_graph = read_graph(directory, base)
+    if snapshot_graph is None:
+        return None
+    snapshot_components = read_components(directory, base)
+    snapshot_names = read_name_index(SortedKeys(snapshot_graph.name_index),
+                                     directory, base)
+    if snapshot_components is None or snapshot_names is None:
+        return None
+    return (base, snapshot_graph, snapshot_components, snapshot_names,
+            updates)
+
+
+def read_delta(delta_directory):
+    """
+    Returns a dict from each of people.csv, movies.csv and stars.csv to its
+    (id, name, birth), (id, title, year) or (person_id, movie_id) rows in
+    `delta_directory`, empty if the file does not exist there.
+    """
+    rows = {}
+    for filename, columns in CSV_COLUMNS:
+        path = os.path.join(delta_directory, filename)
+        rows[filename] = (list(read_columns(path, *columns))
+                          if os.path.exists(path) else [])
+    return rows
+
+
+def update_data(delta_directory, directory=None):
+    """
+    Applies delta CSVs of new people, movies and stars to the data loaded
+    by load_data, in time proportional to the delta rather than the data.
+
+    People and movies whose ids are already loaded are skipped, and so are
+    stars rows that reference missing ids, which count as missing_stars.
+    The component index is updated by merging the components new stars
+    join. If `directory` is given, the rows applied by this and any earlier
+    calls without one are persisted there with save_updates.
+
+    Returns a dict counting the people, movies and stars added,
+    the stars rows skipped and the components merged.
+    """
+    added, applied = apply_rows(read_delta(delta_directory))
+    for filename, rows in applied.items():
+        unsaved[filename].extend(rows)
+    if directory is not None:
+        save_updates(directory)
+    return added
+
+
+def apply_rows(rows):
+    """
+    Applies a dict of people.csv, movies.csv and stars.csv rows to the
+    loaded data, as update_data describes. Returns (added, applied): the
+    counts update_data returns, and the rows that were applied, including
+    stars rows with missing ids, by CSV file name.
+    """
+    global missing_stars
+    added = {"people": [], "movies": [], "missing_stars": 0, "merged": 0}
+    # Stars rows to append: those added, and those with missing ids
+    star_rows = []
+
+    for row in rows["people.csv"]:
+        person_id, name, birth = row
+        if graph is not None:
+            if graph.add_person(person_id, name, birth) is None:
+                continue
+            if components is not None:
+                components.add_person()
+        elif person_id in people:
+            continue
+        else:
+            people[person_id] = {"name": name, "birth": birth,
+                                 "movies": set()}
+            names.setdefault(name.lower(), set()).add(person_id)
+        if name_index is not None:
+            name_index.add(name.lower())
+        added["people"].append(row)
+
+    for row in rows["movies.csv"]:
+        movie_id, title, year = row
+        if graph is not None:
+            if graph.add_movie(movie_id, title, year) is None:
+                continue
+        elif movie_id in movies:
+            continue
+        else:
+            movies[movie_id] = {"title": title, "year": year, "stars": set()}
+            insort(movie_years, (int(year) if year.isdigit() else 0, movie_id))
+            year_exclusions.clear()
+        added["movies"].append(row)
+
+    # Ids repeat across stars rows, so each is looked up in the Graph once
+    person_at, movie_at = {}, {}
+    for person_id, movie_id in rows["stars.csv"]:
+        if graph is None:
+            if person_id not in people or movie_id not in movies:
+                added["missing_stars"] += 1
+                star_rows.append((person_id, movie_id))
+            elif movie_id not in people[person_id]["movies"]:
+                people[person_id]["movies"].add(movie_id)
+                movies[movie_id]["stars"].add(person_id)
+                star_rows.append((person_id, movie_id))
+            continue
+
+        if person_id not in person_at:
+            person_at[person_id] = graph.person_index.get(person_id)
+        if movie_id not in movie_at:
+            movie_at[movie_id] = graph.movie_index.get(movie_id)
+        person, movie = person_at[person_id], movie_at[movie_id]
+        if person is None or movie is None:
+            added["missing_stars"] += 1
+            star_rows.append((person_id, movie_id))
+        elif graph.add_star(person, movie):
+            star_rows.append((person_id, movie_id))
+            # A movie's cast is already one component, so joining any
+            # other star of it joins them all
+            co_star = next(
+                (p for p in graph.stars_of(movie) if p != person), None)
+            if (components is not None and co_star is not None
+                    and components.union(person, co_star)):
+                added["merged"] += 1
+    missing_stars += added["missing_stars"]
+    if graph is not None:
+        graph.missing_stars = missing_stars
+
+    applied = {"people.csv": added["people"], "movies.csv": added["movies"],
+               "stars.csv": star_rows}
+    added["people"] = len(added["people"])
+    added["movies"] = len(added["movies"])
+    added["stars"] = len(star_rows) - added["missing_stars"]
+    return added, applied
+
+
+def save_updates(directory):
+    """
+    Appends the rows applied since they were last saved to the CSVs in
+    `directory`. If it was loaded with `cache`, the rows are also logged
+    next to its snapshots, which load_data replays instead of rebuilding
+    them, so saving takes time proportional to the rows. Once the log
+    holds more than COMPACT_AFTER rows, the snapshots are rewritten from
+    the loaded Graph instead and the log is cleared.
+    """
+    global cached_signature, logged_rows
+    rows = {filename: list(unsaved[filename]) for filename in unsaved}
+    count = sum(map(len, rows.values()))
+    if count == 0:
+        return
+    before = signature(directory)
+    for filename, columns in CSV_COLUMNS:
+        append_rows(os.path.join(directory, filename), columns,
+                    rows[filename])
+    for pending in unsaved.values():
+        pending.clear()
+    if cached_signature is None:
+        return
+
+    logged_rows += count
+    if logged_rows <= COMPACT_AFTER:
+        log_update(directory, before, rows)
+        return
+    folded = fold_updates(graph)
+    save_graph(folded, directory)
+    save_components(components, directory)
+    load_cached_name_index(SortedKeys(folded.name_index), directory)
+    clear_updates(directory)
+    cached_signature = signature(directory)
+    logged_rows = 0
 
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        usage="python degrees.py [--bidirectional] [--paths K] "
+              "[--min-year YEAR] [--max-year YEAR] [--exclude MOVIE_ID ...] "
+              "[--dict | --no-cache] [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--bidirectional", action="store_true",
+                        help="search from both people at once")
+    parser.add_argument("--paths", type=int, metavar="K",
+                        help="count shortest paths and list the K best")
+    parser.add_argument("--min-year", type=int,
+                        help="only use movies released in or after this year")
+    parser.add_argument("--max-year", type=int,
+                        help="only use movies released in or before this year")
+    parser.add_argument("--exclude", action="append", default=[],
+                        metavar="MOVIE_ID", help="never use this movie")
+    storage = parser.add_mutually_exclusive_group()
+    storage.add_argument("--dict", action="store_true",
+                         help="load the CSVs into dictionaries of sets")
+    storage.add_argument("--no-cache", action="store_true",
+                         help="parse the CSVs instead of using a snapshot")
+    args = parser.parse_args()
+    directory = args.directory
+    if args.paths is not None and args.dict:
+        parser.error("--paths requires the compact graph")
+    if args.paths is not None and (args.min_year is not None
+                                   or args.max_year is not None
+                                   or args.exclude):
+        parser.error("--paths does not support --min-year, --max-year "
+                     "or --exclude")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(directory, compact=not args.dict,
+              cache=not (args.dict or args.no_cache))
     print("Data loaded.")
+    if missing_stars:
+        print(f"Skipped {missing_stars} stars rows "
+              "referencing missing people or movies.")
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -76,39 +385,75 @@ def main():
         print(f"Same person: {people[source]['name']}")
         return
 
-    path = shortest_path(source, target)
+    if args.paths is not None:
+        start = time.perf_counter()
+        count = count_shortest_paths(source, target)
+        paths = list(k_shortest_paths(source, target, args.paths))
+        print(f"Search took {time.perf_counter() - start:.3f}s.")
+        if not paths:
+            print("Not connected.")
+            return
+        print(f"{count} shortest paths of {len(paths[0])} degrees.")
+        for n, path in enumerate(paths, 1):
+            print(f"Path {n}, {len(path)} degrees:")
+            print_path(source, path)
+        return
+
+    search = shortest_path_bidirectional if args.bidirectional else shortest_path
+    start = time.perf_counter()
+    path = search(source, target, args.min_year, args.max_year, args.exclude)
+    print(f"Search took {time.perf_counter() - start:.3f}s.")
 
     if path is None:
         print("Not connected.")
     else:
         degrees = len(path)
         print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
 
 
-def shortest_path(source, target):
+def print_path(source, path):
+    """
+    Prints each step of a list of (movie_id, person_id) pairs from the source.
+    """
+    degrees = len(path)
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+def shortest_path(source, target, min_year=None, max_year=None, exclude=()):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    Only movies released in [min_year, max_year] (either may be None) and
+    whose movie_id is not in `exclude` are used.
+
     If no possible path, returns None.
     """
+    if graph is not None:
+        pair = compact_pair(source, target)
+        if pair is None:
+            return None
+        return path_ids(graph.shortest_path(
+            *pair, min_year, max_year, movie_indices(exclude)))
+
     # BFS with QueueFrontier over people graph
     start = Node(state=source, parent=None, action=None)  # action := movie_id
     frontier = QueueFrontier()
     frontier.add(start)
     explored = set()
+    movies_seen = excluded_movies(min_year, max_year, exclude)
 
     while not frontier.empty():
         node = frontier.remove()
         explored.add(node.state)
 
-        for movie_id, person_id in neighbors_for_person(node.state):
+        for movie_id, person_id in unexpanded_neighbors(node.state, movies_seen):
             if person_id in explored or frontier.contains_state(person_id):
                 continue
 
@@ -129,12 +474,244 @@ def shortest_path(source, target):
     return None
 
 
+def shortest_path_bidirectional(source, target, min_year=None, max_year=None,
+                                exclude=()):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, like shortest_path,
+    but grows a frontier from each end and always expands the smaller one.
+
+    If no possible path, returns None.
+    """
+    if graph is not None:
+        pair = compact_pair(source, target)
+        if pair is None:
+            return None
+        return path_ids(graph.shortest_path_bidirectional(
+            *pair, min_year, max_year, movie_indices(exclude)))
+
+    if source == target:
+        return []
+
+    # Maps person_id -> (movie_id, person_id) of the step that reached it,
+    # and person_id -> number of steps from that side's starting person
+    forward_parents, forward_depth = {source: None}, {source: 0}
+    backward_parents, backward_depth = {target: None}, {target: 0}
+    forward_layer, backward_layer = [source], [target]
+    forward_movies = excluded_movies(min_year, max_year, exclude)
+    backward_movies = set(forward_movies)
+
+    while forward_layer and backward_layer:
+        if len(forward_layer) <= len(backward_layer):
+            forward_layer, meeting = expand_layer(
+                forward_layer, forward_parents, forward_depth, backward_depth,
+                forward_movies)
+        else:
+            backward_layer, meeting = expand_layer(
+                backward_layer, backward_parents, backward_depth, forward_depth,
+                backward_movies)
+
+        if meeting is not None:
+            # Walk back to the source, then forward to the target
+            path = []
+            person_id = meeting
+            while forward_parents[person_id] is not None:
+                movie_id, parent_id = forward_parents[person_id]
+                path.append((movie_id, person_id))
+                person_id = parent_id
+            path.reverse()
+            person_id = meeting
+            while backward_parents[person_id] is not None:
+                movie_id, person_id = backward_parents[person_id]
+                path.append((movie_id, person_id))
+            return path
+
+    return None
+
+
+def expand_layer(layer, parents, depth, other_depth, movies_seen):
+    """
+    Expands every person in one BFS layer, recording parents and depths,
+    and marking expanded movies in `movies_seen`.
+
+    Returns the next layer and the person where this side meets the
+    other side on the shortest combined path, or None if they do not meet.
+    """
+    next_layer = []
+    meeting, best = None, None
+    for person_id in layer:
+        for movie_id, neighbor_id in unexpanded_neighbors(person_id, movies_seen):
+            if neighbor_id in depth:
+                continue
+            parents[neighbor_id] = (movie_id, person_id)
+            depth[neighbor_id] = depth[person_id] + 1
+            next_layer.append(neighbor_id)
+            if neighbor_id in other_depth:
+                total = depth[neighbor_id] + other_depth[neighbor_id]
+                if best is None or total < best:
+                    meeting, best = neighbor_id, total
+    return next_layer, meeting
+
+
+def shortest_paths_from(source, targets):
+    """
+    Returns a dict mapping each target person_id to the shortest list of
+    (movie_id, person_id) pairs from the source, or to None if not connected.
+
+    All targets are answered from a single BFS tree grown from the source.
+    """
+    if graph is not None:
+        index = graph.person_index
+        source = index[source]
+        targets = [index[target] for target in targets]
+        if components is not None:
+            # Only search for targets in the source's component
+            paths = {target: None for target in targets}
+            paths.update(graph.paths_from(source, [
+                target for target in targets
+                if components.connected(source, target)]))
+        else:
+            paths = graph.paths_from(source, targets)
+        return {graph.person_ids[target]: path_ids(path)
+                for target, path in paths.items()}
+
+    remaining = set(targets)
+    paths = {target: None for target in remaining}
+    if source in remaining:
+        paths[source] = []
+        remaining.discard(source)
+
+    # Maps person_id -> (movie_id, person_id) of the step that reached it
+    parents = {source: None}
+    movies_seen = set()
+    layer = [source]
+    while layer and remaining:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor_id in unexpanded_neighbors(person_id, movies_seen):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id in remaining:
+                    path = []
+                    step = neighbor_id
+                    while parents[step] is not None:
+                        movie, parent = parents[step]
+                        path.append((movie, step))
+                        step = parent
+                    path.reverse()
+                    paths[neighbor_id] = path
+                    remaining.discard(neighbor_id)
+                next_layer.append(neighbor_id)
+        layer = next_layer
+
+    return paths
+
+
+def movie_indices(movie_ids):
+    """Returns the Graph indices of the known movie_ids in `movie_ids`."""
+    return tuple(graph.movie_index[movie_id] for movie_id in movie_ids
+                 if movie_id in graph.movie_index)
+
+
+def excluded_movies(min_year=None, max_year=None, exclude=()):
+    """
+    Returns a set of the movie_ids released outside [min_year, max_year]
+    or listed in `exclude`, to seed a dict-mode search's expanded movies.
+    """
+    if min_year is None and max_year is None:
+        return set(exclude)
+
+    key = (min_year, max_year)
+    outside = year_exclusions.get(key)
+    if outside is None:
+        # Movies before min_year and after max_year are runs of movie_years
+        outside = set()
+        if min_year is not None:
+            end = bisect_left(movie_years, (min_year,))
+            outside.update(movie_id for _, movie_id in movie_years[:end])
+        if max_year is not None:
+            start = bisect_left(movie_years, (max_year + 1,))
+            outside.update(movie_id for _, movie_id in movie_years[start:])
+        if len(year_exclusions) >= MASK_CACHE_SIZE:
+            year_exclusions.pop(next(iter(year_exclusions)))
+        year_exclusions[key] = outside
+    excluded = outside.copy()
+    excluded.update(exclude)
+    return excluded
+
+
+def compact_pair(source, target):
+    """
+    Returns the Graph indices of two person_ids, or None if the component
+    index shows they are not connected. Requires the compact Graph.
+    """
+    if graph is None:
+        raise RuntimeError("requires load_data(directory, compact=True)")
+    source, target = graph.person_index[source], graph.person_index[target]
+    if components is not None and not components.connected(source, target):
+        return None
+    return source, target
+
+
+def count_shortest_paths(source, target):
+    """
+    Returns how many distinct shortest lists of (movie_id, person_id) pairs
+    connect the source to the target, counted over the BFS-layered DAG
+    without enumerating them.
+    """
+    pair = compact_pair(source, target)
+    return 0 if pair is None else graph.count_shortest_paths(*pair)
+
+
+def all_shortest_paths(source, target, limit=None):
+    """
+    Lazily yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, up to `limit` paths if given.
+    """
+    pair = compact_pair(source, target)
+    if pair is not None:
+        for path in graph.all_shortest_paths(*pair, limit):
+            yield path_ids(path)
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Lazily yields up to k distinct lists of (movie_id, person_id) pairs
+    that connect the source to the target without repeating a person,
+    shortest first.
+    """
+    pair = compact_pair(source, target)
+    if pair is not None:
+        for path in graph.k_shortest_paths(*pair, k):
+            yield path_ids(path)
+
+
+def path_ids(path):
+    """
+    Converts a path of Graph (movie, person) indices to IMDB ids.
+    """
+    if path is None:
+        return None
+    return [(graph.movie_ids[movie], graph.person_ids[person])
+            for movie, person in path]
+
+
 def person_id_for_name(query_name):
     """
     Returns the IMDB id for a person's name, resolving ambiguities as needed.
     """
     person_ids = list(names.get(query_name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = suggest_names(query_name)
+        if not suggestions:
+            return None
+        print(f"No '{query_name}'. Did you mean:")
+        for i, name in enumerate(suggestions, 1):
+            print(f"{i}: {name}")
+        choice = input("Intended number: ").strip()
+        if choice.isdigit() and 1 <= int(choice) <= len(suggestions):
+            return person_id_for_name(suggestions[int(choice) - 1])
         return None
     elif len(person_ids) > 1:
         print(f"Which '{query_name}'?")
@@ -151,10 +728,82 @@ def person_id_for_name(query_name):
         return person_ids[0]
 
 
+def resolve_person(query):
+    """
+    Returns the IMDB id for an IMDB id or a name, without prompting.
+    Raises ValueError if it matches nobody or more than one person.
+    """
+    if query in people:
+        return query
+    person_ids = sorted(names.get(query.lower(), set()))
+    if len(person_ids) == 0:
+        suggestions = suggest_names(query)
+        if suggestions:
+            raise ValueError(f"person not found: {query}, did you mean: "
+                             + ", ".join(suggestions))
+        raise ValueError(f"person not found: {query}")
+    elif len(person_ids) > 1:
+        raise ValueError(f"ambiguous name {query}, candidates: "
+                         + ", ".join(person_ids))
+    return person_ids[0]
+
+
+def name_keys():
+    """
+    Returns the sorted lowercased names of every person in dict mode,
+    repeated per person, the same keys a Graph's name index sorts by.
+    """
+    return [key for key in sorted(names) for _ in names[key]]
+
+
+def get_name_index():
+    """
+    Returns the NameIndex for the loaded data, building it if needed.
+    """
+    global name_index
+    if name_index is None:
+        if graph is not None:
+            name_index = build_name_index(SortedKeys(graph.name_index))
+            # Names added since the Graph's sorted order was built
+            for key, positions in graph.name_index.added.items():
+                for _ in positions:
+                    name_index.add(key)
+        else:
+            name_index = build_name_index(name_keys())
+    return name_index
+
+
+def display_name(key):
+    """Returns the name as written for a lowercased name key."""
+    return people[min(names[key])]["name"]
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to `limit` distinct names starting with `prefix`,
+    ignoring case.
+    """
+    return [display_name(key)
+            for key in get_name_index().complete(prefix, limit)]
+
+
+def suggest_names(query, max_distance=2, limit=10):
+    """
+    Returns up to `limit` distinct names within `max_distance` typing
+    edits of the query, closest first, ignoring case.
+    """
+    return [display_name(key) for _, key
+            in get_name_index().suggest(query, max_distance, limit)]
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people who starred with a given person.
     """
+    if graph is not None:
+        return {(graph.movie_ids[movie], graph.person_ids[co_star])
+                for movie, co_star in graph.neighbors(graph.person_index[person_id])}
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -163,5 +812,22 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def unexpanded_neighbors(person_id, movies_seen):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with a given
+    person, skipping movies already in `movies_seen` and adding the rest.
+
+    A BFS that passes the same set for every expansion scans each movie's
+    cast at most once, since the first person to reach a movie is the
+    closest one.
+    """
+    for movie_id in people[person_id]["movies"]:
+        if movie_id in movies_seen:
+            continue
+        movies_seen.add(movie_id)
+        for co_star_id in movies[movie_id]["stars"]:
+            yield movie_id, co_star_id
+
+
 if __name__ == "__main__":
     main()
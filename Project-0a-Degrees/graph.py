@@ -0,0 +1,929 @@
+import csv
+import heapq
+import itertools
+import os
+from array import array
+from bisect import bisect_left, insort
+from collections.abc import Mapping
+
+from snapshot import (Overlay, StringTable, read_fresh, save_cache,
+                      signature, write_snapshot)
+
+# File written next to the CSVs to skip parsing them on later runs
+SNAPSHOT = "degrees.snapshot"
+
+# Graph attributes holding strings, stored as StringTables in a snapshot
+STRING_FIELDS = ("person_ids", "person_names", "person_births",
+                 "movie_ids", "movie_titles", "movie_years")
+
+# Graph attributes holding integer arrays
+ARRAY_FIELDS = ("person_offsets", "person_movies",
+                "movie_offsets", "movie_people",
+                "person_order", "movie_order", "name_order",
+                "movie_year", "year_order")
+
+# Number of movie masks kept per Graph for repeated filtered searches
+MASK_CACHE_SIZE = 16
+
+
+class Graph():
+    """
+    Bipartite star graph with people and movies interned to dense integers.
+
+    Adjacency is stored in CSR form: the movies of person `p` are
+    `person_movies[person_offsets[p]:person_offsets[p + 1]]`, and the stars
+    of movie `m` are `movie_people[movie_offsets[m]:movie_offsets[m + 1]]`.
+
+    People, movies and stars added later with add_person, add_movie and
+    add_star are kept in memory beside those arrays, which may be
+    memory-mapped; fold_updates builds fresh arrays that include them.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_order, movie_order, name_order,
+                 movie_year, year_order, missing_stars=0):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Permutations of people / movies sorted by id and by lowercased name
+        self.person_order = person_order
+        self.movie_order = movie_order
+        self.name_order = name_order
+
+        self.person_index = SortedIndex(person_ids, person_order)
+        self.movie_index = SortedIndex(movie_ids, movie_order)
+        self.name_index = SortedIndex(person_names, name_order, str.lower)
+
+        # Release year of each movie (0 if unknown), and movies sorted by it
+        self.movie_year = movie_year
+        self.year_order = year_order
+
+        # Maps (min_year, max_year, excluded movies) -> movie mask
+        self.masks = {}
+
+        # Star rows skipped for referencing missing people or movies
+        self.missing_stars = missing_stars
+
+        # Sorted adjacency of people and movies changed since the CSR
+        # arrays were built: person -> movies, and movie -> stars
+        self.updated_movies = {}
+        self.updated_stars = {}
+
+    def movies_of(self, person):
+        """Returns the movie indices a person starred in."""
+        if person in self.updated_movies:
+            return self.updated_movies[person]
+        offsets = self.person_offsets
+        return self.person_movies[offsets[person]:offsets[person + 1]]
+
+    def stars_of(self, movie):
+        """Returns the person indices who starred in a movie."""
+        if movie in self.updated_stars:
+            return self.updated_stars[movie]
+        offsets = self.movie_offsets
+        return self.movie_people[offsets[movie]:offsets[movie + 1]]
+
+    def make_writable(self):
+        """
+        Wraps the per-person and per-movie fields in Overlays, once,
+        so people and movies can be appended to them.
+        """
+        for field in STRING_FIELDS + ("movie_year",):
+            table = getattr(self, field)
+            if not isinstance(table, Overlay):
+                setattr(self, field, Overlay(table))
+        self.person_index.keys = self.person_ids
+        self.movie_index.keys = self.movie_ids
+        self.name_index.keys = self.person_names
+
+    def add_person(self, person_id, name, birth):
+        """
+        Adds a person with no movies yet and returns their index,
+        or None if the id is already in the graph.
+        """
+        if person_id in self.person_index:
+            return None
+        self.make_writable()
+        person = len(self.person_ids)
+        self.person_ids.append(person_id)
+        self.person_names.append(name)
+        self.person_births.append(birth)
+        self.person_index.add(person_id, person)
+        self.name_index.add(name, person)
+        self.updated_movies[person] = array("i")
+        return person
+
+    def add_movie(self, movie_id, title, year):
+        """
+        Adds a movie with no stars yet and returns its index,
+        or None if the id is already in the graph.
+        """
+        if movie_id in self.movie_index:
+            return None
+        self.make_writable()
+        movie = len(self.movie_ids)
+        self.movie_ids.append(movie_id)
+        self.movie_titles.append(title)
+        self.movie_years.append(year)
+        self.movie_year.append(int(year) if year.isdigit() else 0)
+        self.movie_index.add(movie_id, movie)
+        self.updated_stars[movie] = array("i")
+        self.masks.clear()
+        return movie
+
+    def add_star(self, person, movie):
+        """
+        Records that a person starred in a movie.
+        Returns False if the graph already had that star.
+        """
+        movies = self.movies_of(person)
+        position = bisect_left(movies, movie)
+        if position < len(movies) and movies[position] == movie:
+            return False
+
+        # Copy just this person's and movie's adjacency, kept sorted
+        # like the CSR arrays
+        if person not in self.updated_movies:
+            self.updated_movies[person] = array("i", movies)
+        if movie not in self.updated_stars:
+            self.updated_stars[movie] = array("i", self.stars_of(movie))
+        insort(self.updated_movies[person], movie)
+        insort(self.updated_stars[movie], person)
+        return True
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred with a
+        given person.
+        """
+        for movie in self.movies_of(person):
+            for co_star in self.stars_of(movie):
+                yield movie, co_star
+
+    def movie_mask(self, min_year=None, max_year=None, exclude=()):
+        """
+        Returns a fresh bytearray with one byte per movie, set for movies
+        outside [min_year, max_year] or in `exclude`, for use as the
+        `movies_seen` of a search. Excluded movies then look already
+        expanded, so filtering adds no work per step.
+        """
+        if min_year is None and max_year is None and not exclude:
+            return bytearray(len(self.movie_ids))
+
+        key = (min_year, max_year, frozenset(exclude))
+        mask = self.masks.get(key)
+        if mask is None:
+            mask = bytearray(len(self.movie_ids))
+            # Movies before min_year and after max_year are runs of year_order
+            ranks = range(len(self.year_order))
+
+            def year_at(rank):
+                return self.movie_year[self.year_order[rank]]
+
+            if min_year is not None:
+                end = bisect_left(ranks, min_year, key=year_at)
+                for movie in self.year_order[:end]:
+                    mask[movie] = 1
+            if max_year is not None:
+                start = bisect_left(ranks, max_year + 1, key=year_at)
+                for movie in self.year_order[start:]:
+                    mask[movie] = 1
+            # Movies added since year_order was sorted
+            for movie in range(len(self.year_order), len(self.movie_ids)):
+                year = self.movie_year[movie]
+                if ((min_year is not None and year < min_year)
+                        or (max_year is not None and year > max_year)):
+                    mask[movie] = 1
+            for movie in exclude:
+                mask[movie] = 1
+            if len(self.masks) >= MASK_CACHE_SIZE:
+                self.masks.pop(next(iter(self.masks)))
+            self.masks[key] = mask
+        return bytearray(mask)
+
+    def unexpanded_neighbors(self, person, movies_seen):
+        """
+        Like neighbors, but skips movies already marked in `movies_seen`
+        (a movie_mask) and marks the rest, so a BFS scans each movie's cast
+        at most once.
+        """
+        for movie in self.movies_of(person):
+            if movies_seen[movie]:
+                continue
+            movies_seen[movie] = 1
+            for co_star in self.stars_of(movie):
+                yield movie, co_star
+
+    def shortest_path(self, source, target, min_year=None, max_year=None,
+                      exclude=()):
+        """
+        Returns the shortest list of (movie, person) index pairs
+        that connect the source to the target, using only movies released
+        in [min_year, max_year] and not in `exclude` when those are given.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return []
+
+        # Maps person -> (movie, parent person) of the step that reached it
+        parents = {source: None}
+        movies_seen = self.movie_mask(min_year, max_year, exclude)
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                for movie, co_star in self.unexpanded_neighbors(person, movies_seen):
+                    if co_star in parents:
+                        continue
+                    parents[co_star] = (movie, person)
+                    if co_star == target:
+                        return self.trace(parents, target)
+                    next_layer.append(co_star)
+            layer = next_layer
+
+        return None
+
+    def paths_from(self, source, targets):
+        """
+        Grows one BFS tree from the source until every target is reached.
+
+        Returns a dict mapping each target to its shortest list of
+        (movie, person) index pairs, or to None if it is not connected.
+        """
+        remaining = set(targets)
+        paths = {target: None for target in remaining}
+        parents = {source: None}
+        if source in remaining:
+            paths[source] = []
+            remaining.discard(source)
+
+        movies_seen = self.movie_mask()
+        layer = [source]
+        while layer and remaining:
+            next_layer = []
+            for person in layer:
+                for movie, co_star in self.unexpanded_neighbors(person, movies_seen):
+                    if co_star in parents:
+                        continue
+                    parents[co_star] = (movie, person)
+                    if co_star in remaining:
+                        paths[co_star] = self.trace(parents, co_star)
+                        remaining.discard(co_star)
+                    next_layer.append(co_star)
+            layer = next_layer
+
+        return paths
+
+    def layers(self, source):
+        """
+        Yields the BFS layers from the source, as lists of person indices:
+        first [source], then everyone one step away, and so on.
+        """
+        seen = bytearray(len(self.person_ids))
+        movies_seen = bytearray(len(self.movie_ids))
+        seen[source] = 1
+        layer = [source]
+        while layer:
+            yield layer
+            next_layer = []
+            for person in layer:
+                for movie in self.movies_of(person):
+                    if movies_seen[movie]:
+                        continue
+                    movies_seen[movie] = 1
+                    for co_star in self.stars_of(movie):
+                        if not seen[co_star]:
+                            seen[co_star] = 1
+                            next_layer.append(co_star)
+            layer = next_layer
+
+    def distances(self, source):
+        """
+        Returns an array of BFS distances from the source to every person,
+        with -1 for people who are not connected to it.
+        """
+        distance = array("h", [-1]) * len(self.person_ids)
+        for depth, layer in enumerate(self.layers(source)):
+            for person in layer:
+                distance[person] = depth
+        return distance
+
+    def shortest_path_bidirectional(self, source, target, min_year=None,
+                                    max_year=None, exclude=()):
+        """
+        Returns the same as shortest_path, but grows a frontier from each end
+        and always expands the smaller one.
+        """
+        if source == target:
+            return []
+
+        forward_parents, forward_depth = {source: None}, {source: 0}
+        backward_parents, backward_depth = {target: None}, {target: 0}
+        forward_layer, backward_layer = [source], [target]
+        forward_movies = self.movie_mask(min_year, max_year, exclude)
+        backward_movies = bytearray(forward_movies)
+
+        while forward_layer and backward_layer:
+            if len(forward_layer) <= len(backward_layer):
+                forward_layer, meeting = self.expand_layer(
+                    forward_layer, forward_parents, forward_depth,
+                    backward_depth, forward_movies)
+            else:
+                backward_layer, meeting = self.expand_layer(
+                    backward_layer, backward_parents, backward_depth,
+                    forward_depth, backward_movies)
+
+            if meeting is not None:
+                path = self.trace(forward_parents, meeting)
+                person = meeting
+                while backward_parents[person] is not None:
+                    movie, person = backward_parents[person]
+                    path.append((movie, person))
+                return path
+
+        return None
+
+    def expand_layer(self, layer, parents, depth, other_depth, movies_seen):
+        """
+        Expands every person in one BFS layer, recording parents and depths,
+        and marking expanded movies in `movies_seen`.
+
+        Returns the next layer and the person where this side meets the
+        other side on the shortest combined path, or None if they do not meet.
+        """
+        next_layer = []
+        meeting, best = None, None
+        for person in layer:
+            for movie, co_star in self.unexpanded_neighbors(person, movies_seen):
+                if co_star in depth:
+                    continue
+                parents[co_star] = (movie, person)
+                depth[co_star] = depth[person] + 1
+                next_layer.append(co_star)
+                if co_star in other_depth:
+                    total = depth[co_star] + other_depth[co_star]
+                    if best is None or total < best:
+                        meeting, best = co_star, total
+        return next_layer, meeting
+
+    def shortest_path_dag(self, source, target):
+        """
+        Returns the DAG of every shortest path from the source to the target,
+        as a dict mapping each person on some shortest path (other than the
+        source) to its list of (movie, previous person) steps, ordered from
+        the target back towards the source.
+
+        If no possible path, returns None.
+        """
+        if source == target:
+            return {}
+
+        # BFS until the target is found; layers before it are then complete
+        depth = {source: 0}
+        movies_seen = self.movie_mask()
+        layer = [source]
+        while layer and target not in depth:
+            next_layer = []
+            for person in layer:
+                for movie, co_star in self.unexpanded_neighbors(person, movies_seen):
+                    if co_star not in depth:
+                        depth[co_star] = depth[person] + 1
+                        next_layer.append(co_star)
+            layer = next_layer
+        if target not in depth:
+            return None
+
+        # Walk back from the target, keeping steps that lose one level
+        dag = {}
+        layer = [target]
+        while layer:
+            previous_layer = set()
+            for person in layer:
+                steps = []
+                level = depth[person] - 1
+                for movie in self.movies_of(person):
+                    for co_star in self.stars_of(movie):
+                        if depth.get(co_star, -1) == level:
+                            steps.append((movie, co_star))
+                            if co_star != source:
+                                previous_layer.add(co_star)
+                dag[person] = steps
+            layer = previous_layer
+        return dag
+
+    def count_shortest_paths(self, source, target):
+        """
+        Returns the number of distinct shortest lists of (movie, person)
+        pairs from the source to the target, without enumerating them.
+        """
+        dag = self.shortest_path_dag(source, target)
+        if dag is None:
+            return 0
+
+        # The DAG lists people from the target back, so reversed order
+        # visits every person after all the people before it
+        counts = {source: 1}
+        for person in reversed(list(dag)):
+            counts[person] = sum(counts[previous]
+                                 for _, previous in dag[person])
+        return counts.get(target, 1)
+
+    def all_shortest_paths(self, source, target, limit=None):
+        """
+        Lazily yields every shortest list of (movie, person) pairs from
+        the source to the target, up to `limit` paths if given.
+        """
+        dag = self.shortest_path_dag(source, target)
+        if dag is None:
+            return
+
+        def walk(person, suffix):
+            if person == source:
+                yield suffix[::-1]
+                return
+            for movie, previous in dag[person]:
+                suffix.append((movie, person))
+                yield from walk(previous, suffix)
+                suffix.pop()
+
+        yield from itertools.islice(walk(target, []), limit)
+
+    def k_shortest_paths(self, source, target, k):
+        """
+        Lazily yields up to k distinct lists of (movie, person) pairs from
+        the source to the target, shortest first, none of which repeats a
+        person or a movie.
+
+        All shortest paths come straight from the DAG; if there are fewer
+        than k, longer ones follow by Yen's algorithm over the graph of
+        people and movies, so a path may deviate from an earlier one at a
+        person (leaving by another movie) or at a movie (reaching another
+        person through it).
+        """
+        found = list(self.all_shortest_paths(source, target, k))
+        yield from found
+        if not found or len(found) == k or source == target:
+            return
+
+        candidates = []
+        seen = {tuple(path) for path in found}
+        counter = itertools.count()
+        expanded = 0
+        while len(found) < k:
+            # Every found path contributes its spur deviations, as in Yen's
+            for previous in found[expanded:]:
+                people = [source] + [person for _, person in previous]
+                for i, (movie, _) in enumerate(previous):
+                    root = previous[:i]
+                    banned_people = set(people[:i])
+                    banned_movies = {step_movie for step_movie, _ in root}
+                    sharing = [path for path in found if path[:i] == root]
+                    spurs = (
+                        self.spur_path(
+                            people[i], target, banned_people, banned_movies,
+                            banned_next={path[i][0] for path in sharing}),
+                        self.spur_path(
+                            people[i], target, banned_people, banned_movies,
+                            movie, {path[i][1] for path in sharing
+                                    if path[i][0] == movie}))
+                    for spur in spurs:
+                        if spur is None:
+                            continue
+                        path = root + spur
+                        if tuple(path) not in seen:
+                            seen.add(tuple(path))
+                            heapq.heappush(candidates,
+                                           (len(path), next(counter), path))
+            expanded = len(found)
+            if not candidates:
+                return
+            _, _, path = heapq.heappop(candidates)
+            found.append(path)
+            yield path
+
+    def spur_path(self, source, target, banned_people, banned_movies,
+                  movie=None, banned_next=()):
+        """
+        Returns the shortest list of (movie, person) pairs from the source to
+        the target that uses no person in `banned_people` and no movie in
+        `banned_movies`, or None.
+
+        If `movie` is given the path starts with that movie and its first
+        person is not in `banned_next`; otherwise its first movie is not
+        in `banned_next`.
+        """
+        parents = {source: None}
+        for person in banned_people:
+            parents[person] = None
+        movies_seen = self.movie_mask()
+        for banned in banned_movies:
+            movies_seen[banned] = 1
+
+        if movie is None:
+            first_movies = [m for m in self.movies_of(source)
+                            if m not in banned_next]
+        else:
+            first_movies = [movie]
+        layer = [source]
+        while layer:
+            next_layer = []
+            for person in layer:
+                starting = person == source
+                for step_movie in (first_movies if starting
+                                   else self.movies_of(person)):
+                    if movies_seen[step_movie]:
+                        continue
+                    movies_seen[step_movie] = 1
+                    for co_star in self.stars_of(step_movie):
+                        if co_star in parents or (
+                                starting and movie is not None
+                                and co_star in banned_next):
+                            continue
+                        parents[co_star] = (step_movie, person)
+                        if co_star == target:
+                            return self.trace(parents, target)
+                        next_layer.append(co_star)
+            layer = next_layer
+        return None
+
+    @staticmethod
+    def trace(parents, person):
+        """Follows parent links back to the start and returns the path."""
+        path = []
+        while parents[person] is not None:
+            movie, parent = parents[person]
+            path.append((movie, person))
+            person = parent
+        path.reverse()
+        return path
+
+
+class SortedIndex():
+    """
+    Finds positions in `keys` by binary search over `order`, a permutation
+    of those positions sorted by `normalize(key)`. Keys appended to `keys`
+    afterwards are indexed with add, in a dict beside `order`.
+    """
+
+    def __init__(self, keys, order, normalize=None):
+        self.keys = keys
+        self.order = order
+        self.normalize = normalize
+
+        # Maps normalized keys added since `order` was sorted -> positions
+        self.added = {}
+
+    def add(self, key, position):
+        """Indexes a key appended to `keys` at `position`."""
+        if self.normalize:
+            key = self.normalize(key)
+        self.added.setdefault(key, []).append(position)
+
+    def sort_key(self, rank):
+        key = self.keys[self.order[rank]]
+        return self.normalize(key) if self.normalize else key
+
+    def find(self, key):
+        """Returns the positions of every key equal to `key`."""
+        rank = bisect_left(range(len(self.order)), key, key=self.sort_key)
+        matches = []
+        while rank < len(self.order) and self.sort_key(rank) == key:
+            matches.append(self.order[rank])
+            rank += 1
+        if key in self.added:
+            matches.extend(self.added[key])
+        return matches
+
+    def get(self, key, default=None):
+        matches = self.find(key)
+        return matches[0] if matches else default
+
+    def __getitem__(self, key):
+        matches = self.find(key)
+        if not matches:
+            raise KeyError(key)
+        return matches[0]
+
+    def __contains__(self, key):
+        return bool(self.find(key))
+
+    def __iter__(self):
+        """Yields distinct normalized keys in sorted order."""
+        keys = heapq.merge(map(self.sort_key, range(len(self.order))),
+                           sorted(self.added))
+        previous = None
+        for rank, key in enumerate(keys):
+            if rank == 0 or key != previous:
+                yield key
+            previous = key
+
+
+def sorted_order(keys, normalize=None):
+    """Returns an array of positions in `keys`, sorted by key."""
+    if normalize:
+        order = sorted(range(len(keys)), key=lambda i: normalize(keys[i]))
+    else:
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+    return array("i", order)
+
+
+def build_csr(count, nodes, others):
+    """
+    Groups edges `nodes[i] -> others[i]` by node.
+    Returns (offsets, neighbors) arrays for `count` nodes.
+    """
+    offsets = array("i", [0]) * (count + 1)
+    for node in nodes:
+        offsets[node + 1] += 1
+    for i in range(count):
+        offsets[i + 1] += offsets[i]
+
+    neighbors = array("i", [0]) * len(nodes)
+    cursor = array("i", offsets)
+    for node, other in zip(nodes, others):
+        neighbors[cursor[node]] = other
+        cursor[node] += 1
+    return offsets, neighbors
+
+
+def flatten_csr(count, neighbors_of):
+    """
+    Returns (offsets, neighbors) arrays for `count` nodes whose neighbors
+    are given by the function `neighbors_of`.
+    """
+    offsets = array("i", [0])
+    neighbors = array("i")
+    for node in range(count):
+        neighbors.extend(neighbors_of(node))
+        offsets.append(len(neighbors))
+    return offsets, neighbors
+
+
+def fold_updates(graph):
+    """
+    Returns an in-memory copy of `graph` with the people, movies and stars
+    added since it was built folded into fresh CSR arrays and sorted orders,
+    the same Graph load_graph would build from the updated CSVs.
+    """
+    fields = {field: StringTable.from_strings(getattr(graph, field))
+              for field in STRING_FIELDS}
+    fields["person_offsets"], fields["person_movies"] = flatten_csr(
+        len(graph.person_ids), graph.movies_of)
+    fields["movie_offsets"], fields["movie_people"] = flatten_csr(
+        len(graph.movie_ids), graph.stars_of)
+    fields["person_order"] = sorted_order(fields["person_ids"])
+    fields["movie_order"] = sorted_order(fields["movie_ids"])
+    fields["name_order"] = sorted_order(fields["person_names"], str.lower)
+    fields["movie_year"] = array("h", graph.movie_year)
+    fields["year_order"] = sorted_order(fields["movie_year"])
+    return Graph(**fields, missing_stars=graph.missing_stars)
+
+
+def read_columns(filename, *columns):
+    """
+    Yields tuples of the given columns from a CSV file, read positionally
+    with csv.reader rather than building a dict per row.
+    """
+    with open(filename, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader)
+        positions = [header.index(column) for column in columns]
+        if positions == list(range(len(columns))):
+            for row in reader:
+                yield tuple(row[:len(columns)])
+        else:
+            for row in reader:
+                yield tuple(row[i] for i in positions)
+
+
+def append_rows(filename, columns, rows):
+    """
+    Appends tuples of the given columns to a CSV file,
+    written in the order of the file's own header.
+    """
+    with open(filename, "rb") as f:
+        header = next(csv.reader([f.readline().decode("utf-8")]))
+        f.seek(0, os.SEEK_END)
+        # Start on a new line even if the file lacks a trailing newline
+        if f.tell() > 0:
+            f.seek(-1, os.SEEK_END)
+            newline = f.read(1) not in b"\r\n"
+        else:
+            newline = False
+    positions = [columns.index(column) if column in columns else None
+                 for column in header]
+    with open(filename, "a", encoding="utf-8", newline="") as f:
+        if newline:
+            f.write("\n")
+        writer = csv.writer(f, lineterminator="\n")
+        for row in rows:
+            writer.writerow(["" if i is None else row[i] for i in positions])
+
+
+def load_graph(directory):
+    """
+    Load data from CSV files into a compact Graph.
+
+    Strings go straight into StringTables, and star rows referencing
+    missing people or movies are counted in `graph.missing_stars`.
+    """
+    person_ids, person_names, person_births = (
+        StringTable(), StringTable(), StringTable())
+    person_index = {}
+    for pid, name, birth in read_columns(
+            f"{directory}/people.csv", "id", "name", "birth"):
+        person_index[pid] = len(person_ids)
+        person_ids.append(pid)
+        person_names.append(name)
+        person_births.append(birth)
+
+    movie_ids, movie_titles, movie_years = (
+        StringTable(), StringTable(), StringTable())
+    movie_index = {}
+    for mid, title, year in read_columns(
+            f"{directory}/movies.csv", "id", "title", "year"):
+        movie_index[mid] = len(movie_ids)
+        movie_ids.append(mid)
+        movie_titles.append(title)
+        movie_years.append(year)
+
+    # Encode each distinct (person, movie) edge as one integer,
+    # like the sets in load_data
+    movie_count = len(movie_ids)
+    edges = set()
+    missing_stars = 0
+    for pid, mid in read_columns(
+            f"{directory}/stars.csv", "person_id", "movie_id"):
+        person = person_index.get(pid)
+        movie = movie_index.get(mid)
+        if person is None or movie is None:
+            missing_stars += 1
+        else:
+            edges.add(person * movie_count + movie)
+    del person_index, movie_index
+
+    persons, movies = array("i"), array("i")
+    for edge in sorted(edges):
+        person, movie = divmod(edge, movie_count)
+        persons.append(person)
+        movies.append(movie)
+    del edges
+
+    person_offsets, person_movies = build_csr(len(person_ids), persons, movies)
+    movie_offsets, movie_people = build_csr(movie_count, movies, persons)
+
+    movie_year = array("h", (int(year) if year.isdigit() else 0
+                             for year in movie_years))
+
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 sorted_order(person_ids), sorted_order(movie_ids),
+                 sorted_order(person_names, str.lower),
+                 movie_year, sorted_order(movie_year),
+                 missing_stars=missing_stars)
+
+
+def save_graph(graph, directory):
+    """
+    Writes a snapshot of `graph` next to the CSVs in `directory`.
+    """
+    sections = {}
+    for field in STRING_FIELDS:
+        table = getattr(graph, field)
+        sections[f"{field}.blob"] = table.blob
+        sections[f"{field}.offsets"] = table.offsets
+    for field in ARRAY_FIELDS:
+        sections[field] = getattr(graph, field)
+    write_snapshot(os.path.join(directory, SNAPSHOT),
+                   {"signature": signature(directory),
+                    "missing_stars": graph.missing_stars}, sections)
+
+
+def read_graph(directory, expected=None):
+    """
+    Memory-maps the snapshot in `directory` as a Graph.
+    Returns None if there is no snapshot, the CSVs have changed since
+    (or it was not written for CSVs with signature `expected`, if given),
+    or it was written before some Graph field existed.
+    """
+    snapshot = read_fresh(os.path.join(directory, SNAPSHOT), directory,
+                          expected)
+    if snapshot is None:
+        return None
+    meta, sections = snapshot
+    if not all(field in sections for field in ARRAY_FIELDS):
+        return None
+    fields = {"missing_stars": meta["missing_stars"]}
+    for field in STRING_FIELDS:
+        fields[field] = StringTable(sections[f"{field}.blob"],
+                                    sections[f"{field}.offsets"])
+    for field in ARRAY_FIELDS:
+        fields[field] = sections[field]
+    return Graph(**fields)
+
+
+def load_cached_graph(directory):
+    """
+    Returns the snapshot Graph for `directory`, parsing the CSVs and
+    writing a fresh snapshot first if needed.
+    """
+    graph = read_graph(directory)
+    if graph is None:
+        graph = load_graph(directory)
+        save_cache(save_graph, graph, directory)
+    return graph
+
+
+class PeopleView(Mapping):
+    """
+    Read-only view of a Graph shaped like degrees.people.
+    Entries are built on demand from the graph's arrays.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[m] for m in graph.movies_of(person)}
+        }
+
+    def __contains__(self, person_id):
+        return person_id in self.graph.person_index
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Read-only view of a Graph shaped like degrees.movies.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[p] for p in graph.stars_of(movie)}
+        }
+
+    def __contains__(self, movie_id):
+        return movie_id in self.graph.movie_index
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+class NamesView(Mapping):
+    """
+    Read-only view of a Graph shaped like degrees.names.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+        self.count = None
+
+    def __getitem__(self, name):
+        graph = self.graph
+        matches = graph.name_index.find(name)
+        if not matches:
+            raise KeyError(name)
+        return {graph.person_ids[p] for p in matches}
+
+    def __contains__(self, name):
+        return name in self.graph.name_index
+
+    def __iter__(self):
+        return iter(self.graph.name_index)
+
+    def __len__(self):
+        if self.count is None:
+            self.count = sum(1 for _ in self)
+        return self.count
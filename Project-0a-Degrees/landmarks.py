@@ -0,0 +1,194 @@
+"""
+Landmark distance oracle for degrees of separation.
+
+An offline step picks k well-connected landmark people, runs a BFS from each
+and stores the distance arrays in a snapshot next to the CSVs. For any two
+people s and t, every landmark l then gives, by the triangle inequality,
+
+    |d(l, s) - d(l, t)| <= d(s, t) <= d(l, s) + d(l, t)
+
+so a query takes the tightest bounds over all landmarks in microseconds and
+only falls back to a graph search when they do not meet.
+
+Stars added by degrees.update_data can only shorten distances, so once the
+graph has updates the oracle keeps only the upper bounds, and people added
+since the snapshot get no bounds at all. Like the Graph snapshot, the
+landmark snapshot stays in use while logged updates are replayed over it,
+and goes stale when the CSVs change otherwise or the Graph snapshot is
+rewritten; running this module again rebuilds it.
+
+Usage:
+    python landmarks.py [--landmarks K] [directory]
+    python landmarks.py --query SOURCE TARGET [directory]
+"""
+
+import argparse
+import os
+import sys
+from array import array
+
+import degrees
+from snapshot import read_fresh, signature, write_snapshot
+
+# File written next to the CSVs holding the landmark distance arrays
+SNAPSHOT = "landmarks.snapshot"
+
+LANDMARKS = 16
+
+
+def select_landmarks(graph, k, distances):
+    """
+    Yields up to k landmark people, preferring those in the most movies.
+
+    `distances` is the list of arrays computed so far; a candidate is skipped
+    if it is within one step of an existing landmark, so landmarks spread out
+    instead of clustering around the same few movies.
+    """
+    counts = [len(graph.movies_of(p)) for p in range(len(graph.person_ids))]
+    candidates = sorted(range(len(counts)), key=lambda p: -counts[p])
+    chosen = 0
+    for person in candidates:
+        if chosen == k or counts[person] == 0:
+            return
+        if any(0 <= distance[person] <= 1 for distance in distances):
+            continue
+        chosen += 1
+        yield person
+
+
+def build_landmarks(graph, directory, k=LANDMARKS):
+    """
+    Runs a BFS from k landmarks and writes their distances to a snapshot.
+    """
+    landmarks = array("i")
+    distances = []
+    for landmark in select_landmarks(graph, k, distances):
+        landmarks.append(landmark)
+        distances.append(graph.distances(landmark))
+        print(f"Landmark {len(landmarks)}: "
+              f"{graph.person_names[landmark]}", file=sys.stderr)
+
+    table = array("h")
+    for distance in distances:
+        table.extend(distance)
+    # Written for the same CSVs as the Graph snapshot, so it stays in use
+    # while updates are replayed over that
+    write_snapshot(os.path.join(directory, SNAPSHOT),
+                   {"signature": degrees.cached_signature
+                    or signature(directory)},
+                   {"landmarks": landmarks, "distances": table})
+
+
+class LandmarkOracle():
+    """
+    Answers distance queries from precomputed landmark distances.
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+        self.distances = distances
+        # People in the graph when the distances were computed
+        self.count = (len(distances) // len(landmarks) if len(landmarks)
+                      else len(graph.person_ids))
+
+    def bounds(self, source, target):
+        """
+        Returns (lower, upper) bounds on the distance between two person
+        indices. upper is None if no landmark reaches both of them, and
+        both are None if a landmark shows that they are not connected.
+        """
+        if source == target:
+            return 0, 0
+        distances, count = self.distances, self.count
+        if source >= count or target >= count:
+            # Added since the landmark distances were computed
+            return 1, None
+        updated = bool(self.graph.updated_movies)
+        lower, upper = 1, None
+        for i in range(len(self.landmarks)):
+            s = distances[i * count + source]
+            t = distances[i * count + target]
+            if s < 0 and t < 0:
+                continue
+            if s < 0 or t < 0:
+                # Exactly one of them is in this landmark's component,
+                # unless new stars have joined the components since
+                if updated:
+                    continue
+                return None, None
+            if not updated:
+                lower = max(lower, abs(s - t))
+            if upper is None or s + t < upper:
+                upper = s + t
+        return lower, upper
+
+    def degrees(self, source_id, target_id, exact=True):
+        """
+        Returns (lower, upper) bounds on the degrees of separation between
+        two person ids, both None if they are not connected.
+
+        With `exact`, bounds that do not meet are resolved with a
+        bidirectional search, so lower == upper unless not connected.
+        """
+        index = self.graph.person_index
+        source, target = index[source_id], index[target_id]
+        lower, upper = self.bounds(source, target)
+        if lower is None or lower == upper or not exact:
+            return lower, upper
+        path = self.graph.shortest_path_bidirectional(source, target)
+        if path is None:
+            return None, None
+        return len(path), len(path)
+
+
+def load_oracle(directory):
+    """
+    Returns a LandmarkOracle for the graph loaded by degrees.load_data,
+    or None if there is no landmark snapshot or the CSVs have changed.
+    """
+    snapshot = read_fresh(os.path.join(directory, SNAPSHOT), directory,
+                          degrees.cached_signature)
+    if snapshot is None:
+        return None
+    _, sections = snapshot
+    return LandmarkOracle(degrees.graph, sections["landmarks"],
+                          sections["distances"])
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python landmarks.py [--landmarks K] "
+              "[--query SOURCE TARGET] [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--landmarks", type=int, default=LANDMARKS,
+                        help="number of landmarks to precompute")
+    parser.add_argument("--query", nargs=2, metavar=("SOURCE", "TARGET"),
+                        help="estimate the degrees between two people")
+    args = parser.parse_args()
+
+    degrees.load_data(args.directory, cache=True)
+
+    if args.query is None:
+        build_landmarks(degrees.graph, args.directory, args.landmarks)
+        return
+
+    oracle = load_oracle(args.directory)
+    if oracle is None:
+        sys.exit("No landmarks for this data yet; run without --query first.")
+    try:
+        source, target = map(degrees.resolve_person, args.query)
+    except ValueError as e:
+        sys.exit(str(e))
+
+    lower, upper = oracle.degrees(source, target, exact=False)
+    if lower is None:
+        print("Not connected.")
+    elif lower == upper:
+        print(f"{lower} degrees of separation.")
+    else:
+        print(f"Between {lower} and {upper or '?'} degrees of separation.")
+
+
+if __name__ == "__main__":
+    main()
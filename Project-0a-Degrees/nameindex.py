@@ -0,0 +1,260 @@
+"""
+Prefix completion and typo-tolerant suggestions for people's names.
+
+Names are kept as a sorted sequence of lowercased keys, so a prefix is a
+contiguous range found by binary search. For suggestions, every distinct
+name is indexed by its character trigrams. A name within edit distance k
+of the query must share at least one of any 3k + 1 of the query's trigrams,
+since each edit changes at most three of them. More strongly, it must
+share all but 3k of the query's distinct trigrams, so candidates are the
+names whose trigram hit count reaches that threshold, and only those are
+verified with a bounded edit distance. A query with 3k or fewer trigrams
+gives no such threshold, so instead every name whose length is within k
+of the query's is verified, found through an index of names by length.
+"""
+
+import itertools
+import os
+from array import array
+from bisect import bisect_left, insort
+from collections import Counter
+from collections.abc import Sequence
+
+from snapshot import (StringTable, read_fresh, save_cache, signature,
+                      write_snapshot)
+
+# File written next to the CSVs holding the trigram postings
+SNAPSHOT = "names.snapshot"
+
+# Padding marking the start and end of a name in its trigrams
+PAD = "\0"
+
+
+def trigrams(name):
+    """Returns the set of padded character trigrams of a name."""
+    padded = f"{PAD}{PAD}{name}{PAD}"
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, bound):
+    """
+    Returns the Levenshtein distance between two strings,
+    or bound + 1 if it is greater than `bound`.
+
+    Uses Myers' bit-parallel algorithm, with one bit per character of `a`
+    held in a Python int, so each character of `b` costs a few int ops.
+    """
+    if abs(len(a) - len(b)) > bound:
+        return bound + 1
+    if not a:
+        return min(len(b), bound + 1)
+
+    # Bit i of peq[c] is set where a[i] == c
+    peq = {}
+    for i, c in enumerate(a):
+        peq[c] = peq.get(c, 0) | (1 << i)
+
+    mask = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative = mask, 0
+    score = len(a)
+    for c in b:
+        eq = peq.get(c, 0)
+        xv = eq | negative
+        xh = (((eq & positive) + positive) ^ positive) | eq
+        horizontal_positive = negative | (~(xh | positive) & mask)
+        horizontal_negative = positive & xh
+        if horizontal_positive & last:
+            score += 1
+        elif horizontal_negative & last:
+            score -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & mask
+        horizontal_negative = (horizontal_negative << 1) & mask
+        positive = horizontal_negative | (~(xv | horizontal_positive) & mask)
+        negative = horizontal_positive & xv
+    return min(score, bound + 1)
+
+
+class SortedKeys(Sequence):
+    """
+    The normalized keys of a graph.SortedIndex, in sorted order.
+    """
+
+    def __init__(self, index):
+        self.index = index
+
+    def __getitem__(self, rank):
+        return self.index.sort_key(rank)
+
+    def __len__(self):
+        return len(self.index.order)
+
+
+class NameIndex():
+    """
+    Completion and suggestions over `keys`, a sorted sequence of lowercased
+    names that may repeat, and trigram postings of the ranks of its
+    distinct keys: the ranks for gram `grams[g]` are
+    `postings[offsets[g]:offsets[g + 1]]`. The ranks of distinct keys of
+    length n are likewise `by_length[lengths[n]:lengths[n + 1]]`.
+    Names added after the index was built are kept in a sorted list and
+    checked directly.
+    """
+
+    def __init__(self, keys, grams, offsets, postings, lengths, by_length):
+        self.keys = keys
+        self.grams = grams
+        self.offsets = offsets
+        self.postings = postings
+        self.lengths = lengths
+        self.by_length = by_length
+        self.added = []
+
+    def add(self, key):
+        """Adds a lowercased name to those completed and suggested."""
+        insort(self.added, key)
+
+    def complete(self, prefix, limit=10):
+        """Returns up to `limit` distinct names starting with `prefix`."""
+        prefix = prefix.lower()
+        keys = self.keys
+        rank = bisect_left(keys, prefix)
+        matches = []
+        while rank < len(keys) and len(matches) < limit:
+            key = keys[rank]
+            if not key.startswith(prefix):
+                break
+            if not matches or matches[-1] != key:
+                matches.append(key)
+            rank += 1
+        rank = bisect_left(self.added, prefix)
+        while rank < len(self.added) and self.added[rank].startswith(prefix):
+            matches.append(self.added[rank])
+            rank += 1
+        return sorted(set(matches))[:limit]
+
+    def postings_for(self, gram):
+        """Returns the ranks of names containing `gram`."""
+        g = bisect_left(self.grams, gram)
+        if g == len(self.grams) or self.grams[g] != gram:
+            return ()
+        return self.postings[self.offsets[g]:self.offsets[g + 1]]
+
+    def suggest(self, query, max_distance=2, limit=10):
+        """
+        Returns up to `limit` (distance, name) pairs for distinct names
+        within `max_distance` edits of the query, closest first.
+        """
+        query = query.lower()
+        grams = trigrams(query)
+        lists = [self.postings_for(gram) for gram in grams]
+        threshold = len(grams) - 3 * max_distance
+        if threshold > 0:
+            counts = Counter()
+            for ranks in lists:
+                counts.update(ranks)
+            candidates = [rank for rank, count in counts.items()
+                          if count >= threshold]
+        else:
+            # Too short for matches to share any trigram: take every name
+            # of a length within max_distance of the query's
+            high = min(len(query) + max_distance + 1, len(self.lengths) - 1)
+            low = min(max(0, len(query) - max_distance), high)
+            candidates = self.by_length[self.lengths[low]:self.lengths[high]]
+
+        matches = set()
+        for key in itertools.chain(
+                (self.keys[rank] for rank in candidates), self.added):
+            distance = edit_distance(query, key, max_distance)
+            if distance <= max_distance:
+                matches.add((distance, key))
+        return sorted(matches)[:limit]
+
+
+def build_grams(keys):
+    """
+    Returns (grams, offsets, postings) for the distinct names in `keys`.
+    """
+    index = {}
+    for rank in range(len(keys)):
+        key = keys[rank]
+        if rank and key == keys[rank - 1]:
+            continue
+        for gram in trigrams(key):
+            ranks = index.get(gram)
+            if ranks is None:
+                ranks = index[gram] = array("i")
+            ranks.append(rank)
+
+    grams = StringTable()
+    offsets = array("I", [0])
+    postings = array("i")
+    for gram in sorted(index):
+        grams.append(gram)
+        postings.extend(index[gram])
+        offsets.append(len(postings))
+    return grams, offsets, postings
+
+
+def build_lengths(keys):
+    """
+    Returns (lengths, by_length) for the distinct names in `keys`: their
+    ranks ordered by length, and where each length starts in that order.
+    """
+    ranks = [rank for rank in range(len(keys))
+             if not rank or keys[rank] != keys[rank - 1]]
+    ranks.sort(key=lambda rank: len(keys[rank]))
+    by_length = array("i", ranks)
+    longest = len(keys[ranks[-1]]) if ranks else 0
+    lengths = array("I", [0] * (longest + 2))
+    for rank in ranks:
+        lengths[len(keys[rank]) + 1] += 1
+    for n in range(1, len(lengths)):
+        lengths[n] += lengths[n - 1]
+    return lengths, by_length
+
+
+def build_name_index(keys):
+    """Returns a NameIndex over `keys`, built in memory."""
+    return NameIndex(keys, *build_grams(keys), *build_lengths(keys))
+
+
+def read_name_index(keys, directory, expected=None):
+    """
+    Returns a NameIndex over `keys` with the trigram postings memory-mapped
+    from the snapshot in `directory`, or None if there is no snapshot, the
+    CSVs have changed since (or it was not written for CSVs with signature
+    `expected`, if given), or it predates the length index.
+    """
+    snapshot = read_fresh(os.path.join(directory, SNAPSHOT), directory,
+                          expected)
+    if snapshot is None or "by_length" not in snapshot[1]:
+        return None
+    _, sections = snapshot
+    grams = StringTable(sections["grams.blob"], sections["grams.offsets"])
+    return NameIndex(keys, grams, sections["offsets"], sections["postings"],
+                     sections["lengths"], sections["by_length"])
+
+
+def load_cached_name_index(keys, directory):
+    """
+    Returns a NameIndex over `keys`, the sorted lowercased names of the
+    people in `directory`, memory-mapping the trigram postings from a
+    snapshot next to the CSVs and writing it first if needed.
+    """
+    name_index = read_name_index(keys, directory)
+    if name_index is not None:
+        return name_index
+
+    path = os.path.join(directory, SNAPSHOT)
+    grams, offsets, postings = build_grams(keys)
+    lengths, by_length = build_lengths(keys)
+    save_cache(write_snapshot, path, {"signature": signature(directory)}, {
+        "grams.blob": grams.blob,
+        "grams.offsets": grams.offsets,
+        "offsets": offsets,
+        "postings": postings,
+        "lengths": lengths,
+        "by_length": by_length
+    })
+    return NameIndex(keys, grams, offsets, postings, lengths, by_length)
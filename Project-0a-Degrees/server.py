@@ -0,0 +1,168 @@
+"""
+Long-running query server for degrees.py.
+
+Loads the graph once, then answers shortest_path queries sent as JSON lines,
+either on stdin/stdout or over a local TCP socket. Each request looks like
+
+    {"id": 1, "source": "Kevin Bacon", "target": "102"}
+
+where source and target are IMDB person ids or unambiguous names, and
+gets one response line, in request order per connection:
+
+    {"id": 1, "degrees": 1, "path": [{"movie_id": ..., "movie": ...,
+                                      "person_id": ..., "person": ...}]}
+
+or {"id": 1, "error": "..."}. Queries run in a pool of forked worker
+processes that share the loaded graph copy-on-write (and, with the
+snapshot cache, share its memory-mapped pages outright).
+
+Over TCP every connection is served by its own thread, and requests from
+all connections go to the shared pool as they arrive, so many clients can
+keep connections open and query concurrently.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import socketserver
+import sys
+import threading
+
+import degrees
+
+
+def describe(path):
+    """
+    Returns a path of (movie_id, person_id) pairs with titles and names.
+    """
+    return [{
+        "movie_id": movie_id,
+        "movie": degrees.movies[movie_id]["title"],
+        "person_id": person_id,
+        "person": degrees.people[person_id]["name"]
+    } for movie_id, person_id in path]
+
+
+def answer(line):
+    """
+    Answers one JSON request line, returning the JSON response line.
+    Any error becomes an error response, so one bad request cannot take
+    down the server or a connection.
+    """
+    request_id = None
+    try:
+        request = json.loads(line)
+        request_id = request.get("id")
+        source = degrees.resolve_person(str(request["source"]))
+        target = degrees.resolve_person(str(request["target"]))
+        path = degrees.shortest_path_bidirectional(source, target)
+        if path is None:
+            response = {"id": request_id, "degrees": None, "path": None}
+        else:
+            response = {"id": request_id, "degrees": len(path),
+                        "path": describe(path)}
+    except Exception as e:
+        response = {"id": request_id, "error": str(e) or type(e).__name__}
+    return json.dumps(response)
+
+
+def serve_lines(lines, write, pool):
+    """
+    Answers every non-blank line, writing responses in request order.
+    With a pool, each line is submitted as soon as it is read and a writer
+    thread sends the results back as they finish, so a connection that
+    stays open never holds up the pool for other connections.
+    """
+    if pool is None:
+        for line in lines:
+            if line.strip():
+                write(answer(line) + "\n")
+        return
+
+    # FIFO of AsyncResults, ended by None
+    pending = queue.Queue()
+
+    def send():
+        client_gone = False
+        while True:
+            result = pending.get()
+            if result is None:
+                return
+            try:
+                response = result.get()
+            except Exception as e:
+                # answer handles its own errors, so the pool itself failed
+                response = json.dumps({"id": None, "error": str(e)})
+            if client_gone:
+                continue
+            try:
+                write(response + "\n")
+            except OSError as e:
+                # Keep draining results until the reader reaches the end
+                print(f"Client disconnected: {e}", file=sys.stderr)
+                client_gone = True
+
+    writer = threading.Thread(target=send, daemon=True)
+    writer.start()
+    try:
+        for line in lines:
+            if line.strip():
+                pending.put(pool.apply_async(answer, (line,)))
+    finally:
+        pending.put(None)
+        writer.join()
+
+
+class Handler(socketserver.StreamRequestHandler):
+
+    def handle(self):
+        lines = (line.decode("utf-8") for line in self.rfile)
+        serve_lines(lines, lambda s: (self.wfile.write(s.encode("utf-8")),
+                                      self.wfile.flush()),
+                    self.server.pool)
+
+
+class Server(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python server.py [--port PORT] [--workers N] [directory]")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--port", type=int,
+                        help="listen on this localhost port instead of stdin")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="worker processes (0 answers in this process)")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, cache=True)
+    print("Data loaded.", file=sys.stderr)
+
+    # Fork after loading so every worker inherits the graph
+    pool = None
+    if args.workers > 0:
+        pool = multiprocessing.get_context("fork").Pool(args.workers)
+
+    try:
+        if args.port is None:
+            serve_lines(sys.stdin, lambda s: (sys.stdout.write(s),
+                                              sys.stdout.flush()), pool)
+        else:
+            with Server(("127.0.0.1", args.port), Handler) as server:
+                server.pool = pool
+                print(f"Listening on 127.0.0.1:{args.port}", file=sys.stderr)
+                server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if pool:
+            pool.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,251 @@
+"""
+Binary snapshots of arrays, memory-mapped on load.
+
+A snapshot file is laid out as:
+
+    MAGIC | header length (8 bytes) | JSON header | padding | sections...
+
+The header holds caller metadata plus, for each named section, its
+array typecode, byte offset and byte length. Sections are 8-byte aligned
+so they can be cast to typed memoryviews straight from the mapping.
+"""
+
+import json
+import mmap
+import os
+import sys
+from array import array
+from collections.abc import Sequence
+
+MAGIC = b"DEGSNAP1"
+ALIGN = 8
+
+# CSV files whose size and modification time guard every snapshot
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+# File next to the snapshots logging rows appended to the CSVs since they
+# were written, one JSON object per update
+UPDATES = "updates.log"
+
+
+def signature(directory):
+    """
+    Returns the size and mtime of each source CSV in `directory`,
+    used to tell whether a snapshot is still fresh.
+    """
+    result = {}
+    for filename in SOURCES:
+        stat = os.stat(os.path.join(directory, filename))
+        result[filename] = [stat.st_size, stat.st_mtime_ns]
+    return result
+
+
+def padding(offset):
+    return -offset % ALIGN
+
+
+def write_snapshot(path, meta, sections):
+    """
+    Writes `sections` (a dict of name -> array or bytes) and `meta`
+    (any JSON-serialisable value) to `path`, replacing it atomically.
+    """
+    layout = {}
+    offset = 0
+    for name, data in sections.items():
+        typecode = data.typecode if isinstance(data, array) else "B"
+        length = memoryview(data).nbytes
+        layout[name] = [typecode, offset, length]
+        offset += length + padding(length)
+
+    header = json.dumps({
+        "byteorder": sys.byteorder,
+        "meta": meta,
+        "sections": layout
+    }).encode("utf-8")
+    start = len(MAGIC) + 8 + len(header)
+    start += padding(start)
+
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(header).to_bytes(8, "little"))
+        f.write(header)
+        f.write(b"\0" * (start - f.tell()))
+        for name, data in sections.items():
+            length = memoryview(data).nbytes
+            f.write(data)
+            f.write(b"\0" * padding(length))
+    os.replace(tmp, path)
+
+
+def save_cache(save, *args):
+    """
+    Calls save(*args) to write a cache snapshot, ignoring OSError, since
+    read-only data directories still work, just without a cache.
+    Returns True if the snapshot was written.
+    """
+    try:
+        save(*args)
+    except OSError:
+        return False
+    return True
+
+
+def read_snapshot(path):
+    """
+    Memory-maps the snapshot at `path`.
+
+    Returns (meta, sections), where sections maps each name to a
+    read-only memoryview of its typecode, or None if the file is missing
+    or was written by an incompatible version or machine.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (FileNotFoundError, ValueError):
+        return None
+
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    length = int.from_bytes(buffer[len(MAGIC):len(MAGIC) + 8], "little")
+    header_start = len(MAGIC) + 8
+    header = json.loads(buffer[header_start:header_start + length])
+    if header["byteorder"] != sys.byteorder:
+        return None
+
+    start = header_start + length
+    start += padding(start)
+    view = memoryview(buffer)
+    sections = {}
+    for name, (typecode, offset, nbytes) in header["sections"].items():
+        section = view[start + offset:start + offset + nbytes]
+        sections[name] = section.cast(typecode)
+    return header["meta"], sections
+
+
+def read_fresh(path, directory, expected=None):
+    """
+    Like read_snapshot, but also returns None if the CSVs in `directory`
+    have changed since the snapshot was written, or if it was written for
+    CSVs with signature `expected` when that is given.
+    """
+    if expected is None:
+        expected = signature(directory)
+    snapshot = read_snapshot(path)
+    if snapshot is None or snapshot[0].get("signature") != expected:
+        return None
+    return snapshot
+
+
+def snapshot_signature(path):
+    """
+    Returns the CSV signature a snapshot was written for, or None if
+    there is no readable snapshot at `path`.
+    """
+    snapshot = read_snapshot(path)
+    return None if snapshot is None else snapshot[0].get("signature")
+
+
+def log_update(directory, before, rows):
+    """
+    Appends to the update log an update taking the CSVs in `directory`
+    from signature `before` to their signature now by appending `rows`
+    (a dict of file name -> list of rows).
+    """
+    entry = {"before": before, "after": signature(directory), "rows": rows}
+    with open(os.path.join(directory, UPDATES), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def read_updates(directory, base):
+    """
+    Returns the rows of each logged update, in order, that together take
+    the CSVs in `directory` from signature `base` to their signature now,
+    or None if the log does not lead there.
+    """
+    updates = []
+    current = base
+    try:
+        with open(os.path.join(directory, UPDATES), encoding="utf-8") as f:
+            for line in f:
+                entry = json.loads(line)
+                if entry["before"] == current:
+                    updates.append(entry["rows"])
+                    current = entry["after"]
+    except FileNotFoundError:
+        pass
+    except ValueError:
+        # A partly written entry: the snapshots must be rebuilt
+        return None
+    return updates if current == signature(directory) else None
+
+
+def clear_updates(directory):
+    """Removes the update log, once the snapshots include every update."""
+    try:
+        os.remove(os.path.join(directory, UPDATES))
+    except FileNotFoundError:
+        pass
+
+
+class StringTable():
+    """
+    Sequence of strings stored as one UTF-8 blob plus an offsets array.
+    String `i` is `blob[offsets[i]:offsets[i + 1]]`, decoded on access.
+    """
+
+    def __init__(self, blob=None, offsets=None):
+        self.blob = bytearray() if blob is None else blob
+        self.offsets = array("I", [0]) if offsets is None else offsets
+
+    @classmethod
+    def from_strings(cls, strings):
+        table = cls()
+        for string in strings:
+            table.append(string)
+        return table
+
+    def append(self, string):
+        """Adds a string to a table built in memory."""
+        self.blob += string.encode("utf-8")
+        self.offsets.append(len(self.blob))
+
+    def __getitem__(self, i):
+        offsets = self.offsets
+        return str(self.blob[offsets[i]:offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class Overlay(Sequence):
+    """
+    Writable sequence over a read-only one, such as a memory-mapped section.
+    Assigned and appended items are kept in memory; the base is untouched.
+    """
+
+    def __init__(self, base):
+        self.base = base
+        self.length = len(base)
+        self.changes = {}
+
+    def append(self, item):
+        self.changes[self.length] = item
+        self.length += 1
+
+    def __setitem__(self, i, item):
+        if not 0 <= i < self.length:
+            raise IndexError(i)
+        self.changes[i] = item
+
+    def __getitem__(self, i):
+        if i in self.changes:
+            return self.changes[i]
+        return self.base[i]
+
+    def __len__(self):
+        return self.length
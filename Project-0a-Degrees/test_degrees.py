@@ -0,0 +1,180 @@
+"""
+Tests for degrees.py against the small dataset.
+
+Run with: python -m pytest test_degrees.py (from this directory)
+"""
+
+import itertools
+import os
+import shutil
+import tempfile
+import unittest
+
+import degrees
+from snapshot import UPDATES
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+def simple_paths(source, target, max_degrees):
+    """
+    Returns every list of (movie_id, person_id) pairs of at most
+    `max_degrees` steps from the source to the target that repeats no
+    person and no movie, found by exhaustive search.
+    """
+    paths = []
+
+    def extend(person, path, people_used, movies_used):
+        if person == target:
+            paths.append(list(path))
+            return
+        if len(path) == max_degrees:
+            return
+        for movie in sorted(degrees.people[person]["movies"] - movies_used):
+            for co_star in sorted(degrees.movies[movie]["stars"]):
+                if co_star in people_used:
+                    continue
+                path.append((movie, co_star))
+                extend(co_star, path, people_used | {co_star},
+                       movies_used | {movie})
+                path.pop()
+
+    extend(source, [], {source}, set())
+    return paths
+
+
+class KShortestPathsTest(unittest.TestCase):
+
+    def setUp(self):
+        degrees.load_data(SMALL, compact=True)
+
+    def test_matches_exhaustive_search(self):
+        k = 6
+        for source, target in itertools.permutations(sorted(degrees.people), 2):
+            found = list(degrees.k_shortest_paths(source, target, k))
+            if not found:
+                self.assertEqual(simple_paths(source, target, 4), [])
+                continue
+            longest = len(found[-1])
+            expected = simple_paths(source, target, longest)
+            lengths = sorted(len(path) for path in expected)
+
+            # The same lengths as the k shortest simple paths, shortest first
+            self.assertEqual([len(path) for path in found],
+                             lengths[:len(found)], (source, target))
+            if len(found) < k:
+                self.assertEqual(len(found), len(expected))
+
+            # Every path is a distinct simple path of the star graph
+            self.assertEqual(len({tuple(path) for path in found}), len(found))
+            for path in found:
+                self.assertIn(path, expected, (source, target))
+
+    def test_no_detour_through_the_same_movie(self):
+        bacon = degrees.person_id_for_name("Kevin Bacon")
+        cruise = degrees.person_id_for_name("Tom Cruise")
+        for path in degrees.k_shortest_paths(bacon, cruise, 3):
+            movies = [movie for movie, _ in path]
+            self.assertEqual(len(movies), len(set(movies)))
+
+
+def write_csv(path, header, rows):
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(header + "\n")
+        for row in rows:
+            f.write(",".join(row) + "\n")
+
+
+def loaded_state():
+    """
+    Returns the loaded people, movies and missing_stars in plain values,
+    comparable across load_data's modes.
+    """
+    people = {person_id: (person["name"], person["birth"],
+                          sorted(person["movies"]))
+              for person_id, person in degrees.people.items()}
+    movies = {movie_id: (movie["title"], movie["year"],
+                         sorted(movie["stars"]))
+              for movie_id, movie in degrees.movies.items()}
+    return people, movies, degrees.missing_stars
+
+
+class UpdateDataTest(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.data = os.path.join(self.directory, "data")
+        shutil.copytree(SMALL, self.data,
+                        ignore=shutil.ignore_patterns("*.snapshot", UPDATES))
+        self.deltas = []
+        for n, (people, movies, stars) in enumerate([
+                ([("99999991", "Zed Person", "1990")],
+                 [("99999901", "New Movie", "2020")],
+                 [("99999991", "99999901"), ("102", "99999901"),
+                  ("404", "99999901")]),
+                ([("99999992", "Another Person", "")],
+                 [],
+                 [("99999992", "99999901"), ("99999991", "104257")]),
+                ([], [("99999902", "Later Movie", "1999")],
+                 [("129", "99999902"), ("99999992", "99999902")])]):
+            delta = os.path.join(self.directory, f"delta{n}")
+            os.mkdir(delta)
+            write_csv(os.path.join(delta, "people.csv"), "id,name,birth",
+                      people)
+            write_csv(os.path.join(delta, "movies.csv"), "id,title,year",
+                      movies)
+            write_csv(os.path.join(delta, "stars.csv"), "person_id,movie_id",
+                      stars)
+            self.deltas.append(delta)
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def snapshot_mtime(self):
+        return os.stat(os.path.join(self.data, "degrees.snapshot")).st_mtime_ns
+
+    def assert_reloads_match(self, expected):
+        degrees.load_data(self.data, cache=True)
+        self.assertEqual(loaded_state(), expected)
+        self.assertIn("Zed Person", degrees.suggest_names("zed persn"))
+        degrees.load_data(self.data, compact=True)
+        self.assertEqual(loaded_state(), expected)
+        degrees.load_data(self.data)
+        self.assertEqual(loaded_state(), expected)
+
+    def test_cached_and_uncached_reloads_match(self):
+        degrees.load_data(self.data, cache=True)
+        written = self.snapshot_mtime()
+
+        # Rows applied without a directory are saved by the next call with one
+        degrees.update_data(self.deltas[0])
+        degrees.update_data(self.deltas[1], self.data)
+        expected = loaded_state()
+        self.assertTrue(os.path.exists(os.path.join(self.data, UPDATES)))
+
+        # Replayed from the log: the Graph snapshot is not rewritten
+        degrees.load_data(self.data, cache=True)
+        self.assertEqual(self.snapshot_mtime(), written)
+        self.assertEqual(loaded_state(), expected)
+        degrees.update_data(self.deltas[2], self.data)
+        expected = loaded_state()
+        self.assertEqual(degrees.shortest_path("129", "99999992"),
+                         [("99999902", "99999992")])
+        self.assert_reloads_match(expected)
+
+    def test_compacted_reloads_match(self):
+        degrees.load_data(self.data, cache=True)
+        compact_after = degrees.COMPACT_AFTER
+        degrees.COMPACT_AFTER = 0
+        try:
+            for delta in self.deltas:
+                degrees.update_data(delta, self.data)
+        finally:
+            degrees.COMPACT_AFTER = compact_after
+        expected = loaded_state()
+        self.assertFalse(os.path.exists(os.path.join(self.data, UPDATES)))
+        self.assert_reloads_match(expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
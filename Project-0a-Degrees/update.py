@@ -0,0 +1,38 @@
+"""
+Applies delta CSVs of new people, movies and stars to a data directory.
+
+The delta directory holds any of people.csv, movies.csv and stars.csv,
+with the same columns as the data. Its rows are applied to the cached
+Graph and component index incrementally, appended to the data's CSVs,
+and logged next to the snapshots, which the next load replays over them
+instead of rebuilding (see degrees.save_updates).
+
+Usage: python update.py DELTA [directory]
+"""
+
+import argparse
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python update.py DELTA [directory]")
+    parser.add_argument("delta")
+    parser.add_argument("directory", nargs="?", default="large")
+    args = parser.parse_args()
+
+    print("Loading data...")
+    degrees.load_data(args.directory, cache=True)
+    print("Data loaded.")
+
+    added = degrees.update_data(args.delta, args.directory)
+    print(f"Added {added['people']} people, {added['movies']} movies "
+          f"and {added['stars']} stars.")
+    print(f"Skipped {added['missing_stars']} stars rows with missing ids.")
+    print(f"Merged {added['merged']} components, "
+          f"leaving {degrees.components.count()}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Perft and search benchmark for tictactoe.py.
+
+perft counts the positions reachable in exactly 1, 2, ... moves from the
+empty board, stopping at finished games, as a check on the move
+generator: 9, 72, 504, 3024, 15120, 54720, 148176, 200448, 127872.
+
+The search benchmark runs tictactoe.search, the alpha-beta path that
+minimax falls back on for boards outside its solution table, over a
+fixed set of positions in a fixed order. Moves are always tried in cell
+order, so runs are deterministic and comparable across commits. It
+reports the time per move, the search nodes visited (calls to max_value
+and min_value), the nodes that ended in an alpha-beta cutoff, the
+transposition table hit rate, and the calls made to the list-board
+helpers (player, actions, result, winner, terminal) while searching.
+Each position starts from an empty table unless --warm is given.
+minimax's time per move is reported for comparison.
+
+Usage: python benchmark.py [--positions empty|openings|all] [--warm]
+                           [--perft DEPTH] [--json FILE]
+"""
+
+import argparse
+import json
+import time
+from collections import Counter
+
+import tictactoe as ttt
+
+COUNTED = ("max_value", "min_value", "player", "actions", "result",
+           "winner", "terminal")
+
+
+def perft(board, depth):
+    """
+    Returns the number of positions exactly `depth` moves after `board`,
+    not counting moves after the game has ended.
+    """
+    if depth == 0:
+        return 1
+    if ttt.terminal(board):
+        return 0
+    return sum(perft(ttt.result(board, action), depth - 1)
+               for action in sorted(ttt.actions(board)))
+
+
+def reachable_positions():
+    """
+    Returns every non-terminal board reachable from the empty board,
+    fewest moves first.
+    """
+    positions = []
+    seen = set()
+    layer = [ttt.initial_state()]
+    while layer:
+        next_layer = []
+        for board in layer:
+            key = tuple(cell for row in board for cell in row)
+            if key in seen or ttt.terminal(board):
+                continue
+            seen.add(key)
+            positions.append(board)
+            for action in sorted(ttt.actions(board)):
+                next_layer.append(ttt.result(board, action))
+        layer = next_layer
+    return positions
+
+
+def select_positions(name):
+    """Returns the boards of a named position set."""
+    if name == "empty":
+        return [ttt.initial_state()]
+    positions = reachable_positions()
+    if name == "openings":
+        return [board for board in positions
+                if sum(cell is not ttt.EMPTY for row in board
+                       for cell in row) <= 2]
+    return positions
+
+
+def counting(calls):
+    """
+    Shadows each COUNTED function of tictactoe with one that counts its
+    calls in `calls`, and probe and store with ones that count table
+    probes, hits and cutoffs. Recursive calls go through the module
+    globals, so they are counted too. Returns a function that restores
+    the originals.
+    """
+    originals = {name: getattr(ttt, name)
+                 for name in COUNTED + ("probe", "store")
+                 if hasattr(ttt, name)}
+
+    def wrap(name, function):
+        def counted(*args):
+            calls[name] += 1
+            return function(*args)
+        return counted
+
+    def probe(key, alpha, beta):
+        entry = originals["probe"](key, alpha, beta)
+        calls["probes"] += 1
+        if entry is not None:
+            calls["hits"] += 1
+        return entry
+
+    def store(key, perm, value, cell, alpha, beta):
+        # Every searched node stores its value once; a max node (X to
+        # move, so an odd number of empty cells) cut off if it reached
+        # beta, a min node if it fell to alpha
+        if key.count(".") % 2 == 1:
+            calls["cutoffs"] += value >= beta
+        else:
+            calls["cutoffs"] += value <= alpha
+        return originals["store"](key, perm, value, cell, alpha, beta)
+
+    for name, function in originals.items():
+        setattr(ttt, name, wrap(name, function))
+    if "probe" in originals:
+        ttt.probe = probe
+    if "store" in originals:
+        ttt.store = store
+
+    def restore():
+        for name, function in originals.items():
+            setattr(ttt, name, function)
+    return restore
+
+
+def solve(positions, function, warm):
+    """Calls function on every position, clearing the table unless warm."""
+    ttt.transpositions.clear()
+    for board in positions:
+        if not warm:
+            ttt.transpositions.clear()
+        function(board)
+
+
+def measure(positions, warm=False):
+    """
+    Returns a dict of statistics for searching every position: timings
+    with no counting in place, then counts from a second, counted run.
+    """
+    start = time.perf_counter()
+    solve(positions, ttt.search, warm)
+    search_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for board in positions:
+        ttt.minimax(board)
+    minimax_seconds = time.perf_counter() - start
+
+    calls = Counter()
+    restore = counting(calls)
+    try:
+        solve(positions, ttt.search, warm)
+    finally:
+        restore()
+
+    nodes = calls["max_value"] + calls["min_value"]
+    return {
+        "positions": len(positions),
+        "warm": warm,
+        "search_ms_per_move": search_seconds / len(positions) * 1000,
+        "minimax_ms_per_move": minimax_seconds / len(positions) * 1000,
+        "nodes": nodes,
+        "cutoffs": calls["cutoffs"],
+        "probes": calls["probes"],
+        "hits": calls["hits"],
+        "hit_rate": calls["hits"] / calls["probes"] if calls["probes"] else 0,
+        "helper_calls": {name: calls[name] for name in COUNTED[2:]}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python benchmark.py [--positions empty|openings|all] "
+              "[--warm] [--perft DEPTH] [--json FILE]")
+    parser.add_argument("--positions", default="all",
+                        choices=["empty", "openings", "all"],
+                        help="positions to search")
+    parser.add_argument("--warm", action="store_true",
+                        help="keep the transposition table between positions")
+    parser.add_argument("--perft", type=int, default=0, metavar="DEPTH",
+                        help="also count positions up to this many moves")
+    parser.add_argument("--json", metavar="FILE",
+                        help="also write the statistics to a JSON file")
+    args = parser.parse_args()
+
+    report = {}
+    if args.perft:
+        report["perft"] = []
+        print(f"{'depth':>5}{'positions':>12}{'seconds':>10}")
+        for depth in range(1, args.perft + 1):
+            start = time.perf_counter()
+            count = perft(ttt.initial_state(), depth)
+            seconds = time.perf_counter() - start
+            report["perft"].append({"depth": depth, "positions": count,
+                                    "seconds": seconds})
+            print(f"{depth:>5}{count:>12}{seconds:>10.3f}")
+        print()
+
+    stats = measure(select_positions(args.positions), args.warm)
+    report["search"] = stats
+    nodes, positions = stats["nodes"], stats["positions"]
+    print(f"Positions: {positions} "
+          f"({'warm' if args.warm else 'cold'} transposition table)")
+    print(f"Time per move: {stats['search_ms_per_move']:.3f} ms search, "
+          f"{stats['minimax_ms_per_move']:.3f} ms minimax")
+    print(f"Search nodes: {nodes} ({nodes / positions:.1f} per move)")
+    print(f"Cutoffs: {stats['cutoffs']} "
+          f"({stats['cutoffs'] / max(1, nodes):.1%} of nodes)")
+    print(f"Table hits: {stats['hits']} of {stats['probes']} probes "
+          f"({stats['hit_rate']:.1%})")
+    for name, count in stats["helper_calls"].items():
+        print(f"{name} calls: {count} ({count / max(1, nodes):.2f} per node)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,274 @@
+"""
+Tic Tac Toe engine on bitboards.
+
+A state is a pair (x, o) of 9-bit masks, one per player, where bit
+3 * i + j is set if that player holds cell (i, j). Wins are tested
+against precomputed line masks, the player to move comes from popcounts,
+and a move is a bit-OR, so no board is ever copied.
+
+Actions here are cell indices 0-8. from_board, to_board, from_action and
+to_action convert to and from the list-of-lists boards and (i, j) actions
+of tictactoe.py, and best_action answers tictactoe.minimax's question for
+such a board, so runner.py can use either engine.
+"""
+
+import math
+
+from tictactoe import EMPTY, O, SYMMETRIES, X, bound_kind, settles
+
+FULL = 0b111111111
+
+# Masks of the 3 rows, 3 columns and 2 diagonals
+LINES = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# For every mask, the empty cells of a board whose taken cells are that
+# mask, and whether the mask holds a whole line
+FREE = tuple(tuple(cell for cell in range(9) if not mask >> cell & 1)
+             for mask in range(FULL + 1))
+WON = bytes(any(mask & line == line for line in LINES)
+            for mask in range(FULL + 1))
+
+
+def permutation_tables():
+    """
+    Returns, for each of the 8 board symmetries, a 512-entry table mapping
+    a mask to the same cells on the transformed board.
+    """
+    tables = []
+    for perm in SYMMETRIES:
+        table = []
+        for mask in range(FULL + 1):
+            transformed = 0
+            for position, cell in enumerate(perm):
+                if mask >> cell & 1:
+                    transformed |= 1 << position
+            table.append(transformed)
+        tables.append(table)
+    return tables
+
+
+TABLES = permutation_tables()
+
+# Maps canonical key -> (value, kind, best cell on the canonical board),
+# with kinds as in tictactoe.py, kept for the life of the process
+transpositions = {}
+
+
+def initial_state():
+    """
+    Returns starting state of the board.
+    """
+    return 0, 0
+
+
+def player(state):
+    """
+    Returns player who has the next turn.
+    """
+    x, o = state
+    return X if x.bit_count() == o.bit_count() else O
+
+
+def winner(state):
+    """
+    Returns the winner of the game (X or O), if there is one; otherwise None.
+    """
+    x, o = state
+    for line in LINES:
+        if x & line == line:
+            return X
+        if o & line == line:
+            return O
+    return None
+
+
+def terminal(state):
+    """
+    Returns True if game is over (win or draw), False otherwise.
+    """
+    x, o = state
+    return x | o == FULL or winner(state) is not None
+
+
+def utility(state):
+    """
+    Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+    """
+    w = winner(state)
+    if w == X:
+        return 1
+    if w == O:
+        return -1
+    return 0
+
+
+def actions(state):
+    """
+    Returns the empty cells in ascending order, or [] if the game is over.
+    """
+    if terminal(state):
+        return []
+    taken = state[0] | state[1]
+    return [cell for cell in range(9) if not taken >> cell & 1]
+
+
+def result(state, cell):
+    """
+    Returns the state after the player to move takes a cell.
+    Raises ValueError for invalid actions.
+    """
+    x, o = state
+    if not 0 <= cell < 9:
+        raise ValueError("Action out of bounds.")
+    bit = 1 << cell
+    if (x | o) & bit:
+        raise ValueError("Cell already occupied.")
+    if x.bit_count() == o.bit_count():
+        return x | bit, o
+    return x, o | bit
+
+
+def canonical(state):
+    """
+    Returns (key, symmetry): the smallest encoding x << 9 | o of the state
+    over its 8 symmetries, and the index in TABLES of the one producing it.
+    """
+    x, o = state
+    return min((table[x] << 9 | table[o], i) for i, table in enumerate(TABLES))
+
+
+def search(state, alpha, beta):
+    """
+    Returns (value, best cell) for the player to move, by alpha-beta
+    search over cells in ascending order, with a transposition table
+    keyed by canonical state.
+    """
+    x, o = state
+    taken = x | o
+    maximizing = x.bit_count() == o.bit_count()
+
+    # Only the player who just moved can have won
+    opponent = o if maximizing else x
+    for line in LINES:
+        if opponent & line == line:
+            return (-1 if maximizing else 1), None
+    if taken == FULL:
+        return 0, None
+
+    key, symmetry = canonical(state)
+    perm = SYMMETRIES[symmetry]
+    entry = transpositions.get(key)
+    if entry is not None:
+        value, kind, cell = entry
+        if settles(kind, value, alpha, beta):
+            return value, None if cell is None else perm[cell]
+
+    window = alpha, beta
+    best, best_cell = (-math.inf if maximizing else math.inf), None
+    for cell in range(9):
+        bit = 1 << cell
+        if taken & bit:
+            continue
+        child = (x | bit, o) if maximizing else (x, o | bit)
+        score, _ = search(child, alpha, beta)
+        if maximizing and score > best:
+            best, best_cell = score, cell
+            alpha = max(alpha, best)
+        elif not maximizing and score < best:
+            best, best_cell = score, cell
+            beta = min(beta, best)
+        if alpha >= beta:
+            break
+
+    kind = bound_kind(best, *window)
+    transpositions[key] = (best, kind, perm.index(best_cell))
+    return best, best_cell
+
+
+def minimax(state):
+    """
+    Returns the optimal cell for the player to move,
+    or None if the game is over.
+    """
+    if terminal(state):
+        return None
+
+    # Take an immediate win if there is one, like tictactoe.minimax
+    x, o = state
+    taken = x | o
+    mover = x if x.bit_count() == o.bit_count() else o
+    for line in LINES:
+        missing = line & ~mover
+        if missing.bit_count() == 1 and not taken & missing:
+            return missing.bit_length() - 1
+
+    return search(state, -math.inf, math.inf)[1]
+
+
+def playout(board, rng):
+    """
+    Plays uniformly random moves from a list-of-lists board until the game
+    ends, on bitboards, and returns its utility. `rng` is a random.Random.
+    """
+    x, o = from_board(board)
+    x_to_move = x.bit_count() == o.bit_count()
+    while True:
+        if WON[x]:
+            return 1
+        if WON[o]:
+            return -1
+        free = FREE[x | o]
+        if not free:
+            return 0
+        bit = 1 << free[int(rng.random() * len(free))]
+        if x_to_move:
+            x |= bit
+        else:
+            o |= bit
+        x_to_move = not x_to_move
+
+
+def from_board(board):
+    """
+    Returns the state of a list-of-lists board.
+    """
+    x = o = 0
+    for i in range(3):
+        for j in range(3):
+            if board[i][j] == X:
+                x |= 1 << (3 * i + j)
+            elif board[i][j] == O:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(state):
+    """
+    Returns the list-of-lists board of a state.
+    """
+    x, o = state
+    return [[X if x >> (3 * i + j) & 1 else O if o >> (3 * i + j) & 1
+             else EMPTY for j in range(3)] for i in range(3)]
+
+
+def from_action(action):
+    """Returns the cell of an (i, j) action."""
+    i, j = action
+    return 3 * i + j
+
+
+def to_action(cell):
+    """Returns the (i, j) action of a cell, or None for None."""
+    return None if cell is None else divmod(cell, 3)
+
+
+def best_action(board):
+    """
+    Returns the optimal (i, j) action on a list-of-lists board,
+    or None if the game is over, like tictactoe.minimax.
+    """
+    return to_action(minimax(from_board(board)))
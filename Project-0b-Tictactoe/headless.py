@@ -0,0 +1,98 @@
+"""
+Headless Tic Tac Toe runner, for benchmarking engines without pygame.
+
+Plays many games between two players, each an AI engine or a uniformly
+random mover, checking every move against tictactoe.py's rules, and
+reports the results and throughput. With a perfect engine, AI-vs-AI
+games should all be draws and the AI should never lose to random play.
+
+Players:
+    minimax   tictactoe.minimax (solution table lookup)
+    search    tictactoe.search (alpha-beta with a transposition table)
+    bitboard  bitboard.best_action
+    mcts      mcts.MCTS with --playouts per move
+    random    a uniformly random legal move
+
+Usage: python headless.py [--games N] [--x PLAYER] [--o PLAYER]
+                          [--playouts N] [--seed S]
+"""
+
+import argparse
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+PLAYERS = ("minimax", "search", "bitboard", "mcts", "random")
+
+
+def make_player(name, rng, playouts):
+    """
+    Returns a function from a board to the named player's action.
+    """
+    if name == "minimax":
+        return ttt.minimax
+    if name == "search":
+        return ttt.search
+    if name == "bitboard":
+        return bitboard.best_action
+    if name == "mcts":
+        import mcts
+        engine = mcts.MCTS(seed=rng.randrange(2 ** 32))
+        return lambda board: engine.best_action(board, playouts)
+    return lambda board: rng.choice(sorted(ttt.actions(board)))
+
+
+def play(x, o):
+    """
+    Plays one game between two player functions and returns
+    (winner, moves). Raises ValueError if a player makes an illegal move.
+    """
+    board = ttt.initial_state()
+    moves = 0
+    while not ttt.terminal(board):
+        move = (x if ttt.player(board) == ttt.X else o)(board)
+        if move not in ttt.actions(board):
+            raise ValueError(f"illegal move {move} on {board}")
+        board = ttt.result(board, move)
+        moves += 1
+    return ttt.winner(board), moves
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python headless.py [--games N] [--x PLAYER] [--o PLAYER] "
+              "[--playouts N] [--seed S]")
+    parser.add_argument("--games", type=int, default=1000)
+    parser.add_argument("--x", choices=PLAYERS, default="minimax",
+                        help="player for X")
+    parser.add_argument("--o", choices=PLAYERS, default="random",
+                        help="player for O")
+    parser.add_argument("--playouts", type=int, default=1000,
+                        help="MCTS iterations per move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    x = make_player(args.x, rng, args.playouts)
+    o = make_player(args.o, rng, args.playouts)
+
+    results = {ttt.X: 0, ttt.O: 0, None: 0}
+    moves = 0
+    start = time.perf_counter()
+    for _ in range(args.games):
+        winner, count = play(x, o)
+        results[winner] += 1
+        moves += count
+    elapsed = time.perf_counter() - start
+
+    print(f"{args.x} (X) vs {args.o} (O), {args.games} games:")
+    print(f"X wins: {results[ttt.X]}, O wins: {results[ttt.O]}, "
+          f"ties: {results[None]}")
+    print(f"{args.games / elapsed:.1f} games/s, "
+          f"{elapsed / max(1, moves) * 1e6:.1f} us per move")
+
+
+if __name__ == "__main__":
+    main()
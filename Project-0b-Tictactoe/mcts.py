@@ -0,0 +1,268 @@
+"""
+Monte Carlo Tree Search player for Tic Tac Toe style games.
+
+The tree is built with a game's player, actions, result, terminal and
+utility functions, by default those of tictactoe.py (mnk.Game provides them
+for larger boards). Each iteration selects a path down the tree by UCT,
+expands one untried action, plays the game out at random and backs the
+result up the path. Playouts use the game's own `playout(board, rng)` when
+it has one, and bitboard.playout for tictactoe.py, so they run on a
+compact board rather than through the list-board functions.
+
+An MCTS object keeps its tree between moves: when asked about a board that
+is already in the tree, two plies below the last root for instance, that
+subtree becomes the new root and its statistics are reused.
+
+With processes > 1, independent searches from the same board run in a
+pool of forked worker processes (root parallelism), and their root
+statistics are summed before choosing the most visited action. Each
+worker grows a fresh tree and only its root statistics come back, so
+parallel searches neither reuse nor update the object's tree.
+
+Usage: python mcts.py [--playouts N] [--seconds S] [--processes P]
+                      [--games G] [--rows M --columns N --k K]
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import random
+import time
+
+import bitboard
+import tictactoe as ttt
+
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+    """
+    A board in the search tree, with the statistics of the playouts that
+    passed through it. `wins` counts playouts won by the player who moved
+    into this board, with draws as half a win.
+    """
+
+    def __init__(self, board, actions, parent=None, action=None, mover=None):
+        self.board = board
+        self.parent = parent
+        self.action = action
+        self.mover = mover
+        self.children = []
+        self.untried = actions
+        self.visits = 0
+        self.wins = 0.0
+
+    def select(self, exploration):
+        """Returns the child with the highest UCT score."""
+        log_visits = math.log(self.visits)
+        return max(self.children, key=lambda child: (
+            child.wins / child.visits
+            + exploration * math.sqrt(log_visits / child.visits)))
+
+
+class MCTS():
+    """
+    Monte Carlo Tree Search over the game module or object `game`.
+    """
+
+    def __init__(self, game=ttt, playout=None, exploration=EXPLORATION,
+                 seed=None):
+        self.game = game
+        if playout is None:
+            playout = getattr(game, "playout", None)
+        if playout is None:
+            playout = bitboard.playout if game is ttt else self.random_playout
+        self.playout = playout
+        self.exploration = exploration
+        self.rng = random.Random(seed)
+        self.root = None
+
+    def new_node(self, board, parent=None, action=None):
+        """Returns a node for a board, with its actions in random order."""
+        game = self.game
+        actions = [] if game.terminal(board) else sorted(game.actions(board))
+        self.rng.shuffle(actions)
+        mover = None if parent is None else game.player(parent.board)
+        return Node(board, actions, parent, action, mover)
+
+    def random_playout(self, board, rng):
+        """
+        Plays random moves from a board through the game's functions
+        until the game ends, and returns its utility.
+        """
+        game = self.game
+        while not game.terminal(board):
+            board = game.result(board, rng.choice(sorted(game.actions(board))))
+        return game.utility(board)
+
+    def reuse(self, board):
+        """
+        Makes the node for `board` the root, reusing it if it is the
+        current root or one or two moves below it.
+        """
+        if self.root is not None:
+            frontier = [self.root]
+            for _ in range(3):
+                for node in frontier:
+                    if node.board == board:
+                        node.parent = None
+                        self.root = node
+                        return
+                frontier = [child for node in frontier
+                            for child in node.children]
+        self.root = self.new_node(board)
+
+    def iterate(self):
+        """
+        Runs one selection, expansion, playout and backup.
+        """
+        node = self.root
+        while not node.untried and node.children:
+            node = node.select(self.exploration)
+        if node.untried:
+            action = node.untried.pop()
+            child = self.new_node(self.game.result(node.board, action),
+                                  node, action)
+            node.children.append(child)
+            node = child
+
+        value = self.playout(node.board, self.rng)
+        while node is not None:
+            node.visits += 1
+            if node.mover is not None:
+                sign = 1 if node.mover == ttt.X else -1
+                node.wins += (1 + sign * value) / 2
+            node = node.parent
+
+    def search(self, board, playouts=None, seconds=None):
+        """
+        Grows the tree from `board` for `playouts` iterations or `seconds`,
+        whichever comes first (1,000 playouts if neither is given). At
+        least one iteration always runs, so the root has a child to choose
+        unless the game is over.
+        """
+        if playouts is None and seconds is None:
+            playouts = 1000
+        self.reuse(board)
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        count = 0
+        while playouts is None or count < max(1, playouts):
+            if (count and deadline is not None
+                    and time.perf_counter() > deadline):
+                break
+            self.iterate()
+            count += 1
+
+    def statistics(self):
+        """Returns {action: (visits, wins)} for the root's children."""
+        return {child.action: (child.visits, child.wins)
+                for child in self.root.children}
+
+    def best_action(self, board, playouts=None, seconds=None, processes=1):
+        """
+        Returns the most visited action after searching from `board`,
+        or None if the game is over. With processes > 1 the search runs
+        root-parallel in a pool of worker processes, leaving self.root as
+        it was, so the next move's search cannot reuse this one's tree.
+        """
+        if self.game.terminal(board):
+            return None
+        if processes > 1:
+            statistics = parallel_statistics(self.game, board, playouts,
+                                             seconds, processes,
+                                             self.rng.randrange(2 ** 32))
+        else:
+            self.search(board, playouts, seconds)
+            statistics = self.statistics()
+        return max(statistics, key=lambda action: statistics[action][0])
+
+
+# Search shared with forked workers: (game, board, playouts, seconds)
+worker_search = None
+
+
+def worker_statistics(seed):
+    """
+    Runs one independent search for parallel_statistics.
+    """
+    game, board, playouts, seconds = worker_search
+    mcts = MCTS(game, seed=seed)
+    mcts.search(board, playouts, seconds)
+    return mcts.statistics()
+
+
+def parallel_statistics(game, board, playouts, seconds, processes, seed):
+    """
+    Returns {action: (visits, wins)} summed over `processes` independent
+    searches from `board`, each with its own seed and the full budget.
+    """
+    global worker_search
+    worker_search = game, board, playouts, seconds
+
+    # Fork so every worker inherits the game, which may be a module
+    context = multiprocessing.get_context("fork")
+    with context.Pool(processes) as pool:
+        results = pool.map(worker_statistics,
+                           [seed + i for i in range(processes)])
+
+    merged = {}
+    for statistics in results:
+        for action, (visits, wins) in statistics.items():
+            total_visits, total_wins = merged.get(action, (0, 0.0))
+            merged[action] = (total_visits + visits, total_wins + wins)
+    return merged
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mcts.py [--playouts N] [--seconds S] [--processes P] "
+              "[--games G] [--rows M --columns N --k K]")
+    parser.add_argument("--playouts", type=int,
+                        help="iterations per move (default 1000)")
+    parser.add_argument("--seconds", type=float, help="time per move")
+    parser.add_argument("--processes", type=int, default=1,
+                        help="root-parallel worker processes")
+    parser.add_argument("--games", type=int, default=10,
+                        help="games to play against a random player")
+    parser.add_argument("--rows", type=int)
+    parser.add_argument("--columns", type=int)
+    parser.add_argument("--k", type=int)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    if args.rows or args.columns or args.k:
+        import mnk
+        game = mnk.Game(args.rows or 3, args.columns or 3, args.k or 3)
+    else:
+        game = ttt
+    processes = min(args.processes, os.cpu_count() or 1)
+
+    # Alternate sides against a random player
+    rng = random.Random(args.seed)
+    mcts = MCTS(game, seed=args.seed)
+    results = {"wins": 0, "draws": 0, "losses": 0}
+    start = time.perf_counter()
+    moves = 0
+    for g in range(args.games):
+        ai = ttt.X if g % 2 == 0 else ttt.O
+        board = game.initial_state()
+        while not game.terminal(board):
+            if game.player(board) == ai:
+                action = mcts.best_action(board, args.playouts, args.seconds,
+                                          processes)
+                moves += 1
+            else:
+                action = rng.choice(sorted(game.actions(board)))
+            board = game.result(board, action)
+        utility = game.utility(board) * (1 if ai == ttt.X else -1)
+        results["wins" if utility > 0 else "losses" if utility < 0
+                else "draws"] += 1
+    elapsed = time.perf_counter() - start
+    print(f"{results['wins']} wins, {results['draws']} draws, "
+          f"{results['losses']} losses against a random player.")
+    print(f"{elapsed / max(1, moves) * 1000:.1f} ms per move.")
+
+
+if __name__ == "__main__":
+    main()
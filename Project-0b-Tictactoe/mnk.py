@@ -0,0 +1,387 @@
+"""
+m,n,k-game engine: Tic Tac Toe generalized to a board of `rows` x
+`columns` where the first player with `k` marks in a row, column or
+diagonal wins (3,3,3 is Tic Tac Toe, 15,15,5 is gomoku).
+
+Every run of k cells is a "window". The board keeps a count of each
+player's marks in every window, updated only for the windows through the
+cell just played, so a win is detected from the last move alone and the
+heuristic evaluation (windows still open to one player, weighted by how
+full they are) is kept up to date as moves are made and unmade.
+
+best_action runs an alpha-beta search with iterative deepening: depth
+1, 2, 3, ... until the deadline, returning the best move of the deepest
+search that finished.
+
+Usage: python mnk.py [--rows M] [--columns N] [--k K] [--seconds S]
+"""
+
+import argparse
+import math
+import time
+
+from tictactoe import EMPTY, O, X
+
+# Score of a win; wins sooner score higher, so the search prefers them
+WIN = 1000000
+
+# Check the clock once per this many search nodes
+CHECK_EVERY = 64
+
+# Boards with more cells than this only consider moves next to a mark
+NEAR_THRESHOLD = 25
+
+
+# Maps (rows, columns, k) -> (windows, windows through each cell)
+LAYOUTS = {}
+
+
+def layout(rows, columns, k):
+    """
+    Returns (windows, cell_windows) for a board shape: every run of k
+    cells as a tuple, and for each cell the indices of the windows through
+    it. Layouts are built once per shape and shared.
+    """
+    if (rows, columns, k) not in LAYOUTS:
+        windows = []
+        for r in range(rows):
+            for c in range(columns):
+                for dr, dc in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_r, end_c = r + dr * (k - 1), c + dc * (k - 1)
+                    if 0 <= end_r < rows and 0 <= end_c < columns:
+                        windows.append(tuple(
+                            (r + dr * i) * columns + c + dc * i
+                            for i in range(k)))
+        cell_windows = [[] for _ in range(rows * columns)]
+        for w, window in enumerate(windows):
+            for cell in window:
+                cell_windows[cell].append(w)
+        LAYOUTS[rows, columns, k] = windows, cell_windows
+    return LAYOUTS[rows, columns, k]
+
+
+class Timeout(Exception):
+    """Raised inside a search when its deadline has passed."""
+
+
+class Board():
+    """
+    An m,n,k-game position that is changed in place with make and unmake.
+    Cells are numbered row by row, so cell c is (c // columns, c % columns).
+    """
+
+    def __init__(self, rows=3, columns=3, k=3):
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.cells = [EMPTY] * (rows * columns)
+        self.history = []
+        self.winner = None
+
+        # Windows as tuples of cells, and the windows through each cell
+        self.windows, self.cell_windows = layout(rows, columns, k)
+
+        # Marks of each player in each window, and the evaluation for X
+        self.counts = {X: [0] * len(self.windows), O: [0] * len(self.windows)}
+        self.score = 0
+        self.weights = [0] + [4 ** i for i in range(1, k)] + [WIN]
+
+    @classmethod
+    def from_lists(cls, board, k=3):
+        """
+        Returns a Board for a list-of-lists board like tictactoe.py's.
+        Marks are replayed alternately, starting with X.
+        """
+        rows, columns = len(board), len(board[0])
+        position = cls(rows, columns, k)
+        marks = {X: [], O: []}
+        for i in range(rows):
+            for j in range(columns):
+                if board[i][j] in marks:
+                    marks[board[i][j]].append(i * columns + j)
+        for x_cell, o_cell in zip(marks[X], marks[O] + [None]):
+            position.make(x_cell)
+            if o_cell is not None:
+                position.make(o_cell)
+        return position
+
+    def player(self):
+        """Returns the player who has the next turn."""
+        return X if len(self.history) % 2 == 0 else O
+
+    def full(self):
+        return len(self.history) == len(self.cells)
+
+    def terminal(self):
+        """Returns True if someone has won or the board is full."""
+        return self.winner is not None or self.full()
+
+    def value(self, window):
+        """Returns a window's contribution to the evaluation for X."""
+        x, o = self.counts[X][window], self.counts[O][window]
+        if x and o:
+            return 0
+        return self.weights[x] - self.weights[o]
+
+    def make(self, cell):
+        """
+        Plays a cell for the player to move, updating the windows through it.
+        Raises ValueError if the cell is taken.
+        """
+        if self.cells[cell] is not EMPTY:
+            raise ValueError("Cell already occupied.")
+        mark = self.player()
+        counts = self.counts[mark]
+        self.cells[cell] = mark
+        self.history.append(cell)
+        for window in self.cell_windows[cell]:
+            self.score -= self.value(window)
+            counts[window] += 1
+            self.score += self.value(window)
+            if counts[window] == self.k:
+                self.winner = mark
+
+    def unmake(self):
+        """Takes back the last move."""
+        cell = self.history.pop()
+        mark = self.cells[cell]
+        counts = self.counts[mark]
+        self.cells[cell] = EMPTY
+        self.winner = None
+        for window in self.cell_windows[cell]:
+            self.score -= self.value(window)
+            counts[window] -= 1
+            self.score += self.value(window)
+
+    def evaluate(self):
+        """Returns the heuristic value for the player to move."""
+        return self.score if self.player() == X else -self.score
+
+    def actions(self):
+        """
+        Returns the empty cells worth considering. On large boards these
+        are the cells next to a mark, or the centre on an empty board.
+        """
+        if self.terminal():
+            return []
+        if len(self.cells) <= NEAR_THRESHOLD:
+            return [c for c, mark in enumerate(self.cells) if mark is EMPTY]
+        if not self.history:
+            return [(self.rows // 2) * self.columns + self.columns // 2]
+        near = set()
+        for cell in self.history:
+            r, c = divmod(cell, self.columns)
+            for nr in range(max(0, r - 1), min(self.rows, r + 2)):
+                for nc in range(max(0, c - 1), min(self.columns, c + 2)):
+                    if self.cells[nr * self.columns + nc] is EMPTY:
+                        near.add(nr * self.columns + nc)
+        return sorted(near)
+
+    def ordered_actions(self, first=None):
+        """
+        Returns actions sorted by the evaluation just after playing them,
+        best for the player to move first, with `first` ahead of all.
+        """
+        scored = []
+        for cell in self.actions():
+            self.make(cell)
+            # The mover wins, or the evaluation from the mover's side
+            if self.winner is not None:
+                score = math.inf
+            else:
+                score = -self.evaluate()
+            self.unmake()
+            scored.append((cell != first, -score, cell))
+        scored.sort()
+        return [cell for _, _, cell in scored]
+
+    def to_lists(self):
+        """Returns the board as a list of lists, like tictactoe.py's."""
+        return [self.cells[r * self.columns:(r + 1) * self.columns]
+                for r in range(self.rows)]
+
+
+class Game():
+    """
+    The player, actions, result, terminal and utility functions of
+    tictactoe.py for list-of-lists boards of any m,n,k-game, so engines
+    written against that contract (such as mcts.py) can play them.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3):
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+
+    def initial_state(self):
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def player(self, board):
+        x = sum(row.count(X) for row in board)
+        o = sum(row.count(O) for row in board)
+        return X if x == o else O
+
+    def actions(self, board):
+        """Returns the set of (i, j) actions worth considering."""
+        position = Board.from_lists(board, self.k)
+        return {divmod(cell, self.columns) for cell in position.actions()}
+
+    def result(self, board, action):
+        """Returns the board after a move, without changing `board`."""
+        i, j = action
+        if board[i][j] is not EMPTY:
+            raise ValueError("Cell already occupied.")
+        new_board = [row[:] for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        return Board.from_lists(board, self.k).winner
+
+    def terminal(self, board):
+        return Board.from_lists(board, self.k).terminal()
+
+    def utility(self, board):
+        """Returns 1 if X has won the game, -1 if O has won, 0 otherwise."""
+        w = self.winner(board)
+        return 1 if w == X else -1 if w == O else 0
+
+    def playout(self, board, rng):
+        """
+        Plays uniformly random moves from a board until the game ends,
+        on a Board, and returns its utility. `rng` is a random.Random.
+        """
+        position = Board.from_lists(board, self.k)
+        free = [c for c, mark in enumerate(position.cells) if mark is EMPTY]
+        rng.shuffle(free)
+        while position.winner is None and free:
+            position.make(free.pop())
+        winner = position.winner
+        return 1 if winner == X else -1 if winner == O else 0
+
+
+class Search():
+    """
+    Depth-limited alpha-beta (negamax) over a Board, with a deadline.
+    """
+
+    def __init__(self, board, deadline):
+        self.board = board
+        self.deadline = deadline
+        self.nodes = 0
+
+    def negamax(self, depth, alpha, beta, ply):
+        """
+        Returns the value of the board for the player to move, searching
+        `depth` more moves. Raises Timeout once the deadline has passed.
+        """
+        board = self.board
+        if board.winner is not None:
+            # The previous move won
+            return -(WIN - ply)
+        if board.full():
+            return 0
+        if depth == 0:
+            return board.evaluate()
+
+        self.nodes += 1
+        if self.nodes % CHECK_EVERY == 0 and time.perf_counter() > self.deadline:
+            raise Timeout()
+
+        best = -math.inf
+        for cell in board.ordered_actions() if depth > 1 else board.actions():
+            board.make(cell)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, ply + 1)
+            finally:
+                board.unmake()
+            if score > best:
+                best = score
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                break
+        return best
+
+    def root(self, depth, first):
+        """
+        Returns (value, best cell) searching `depth` moves from the root,
+        trying `first` before the other moves.
+        """
+        board = self.board
+        alpha, beta = -math.inf, math.inf
+        best, best_cell = -math.inf, None
+        for cell in board.ordered_actions(first):
+            board.make(cell)
+            try:
+                score = -self.negamax(depth - 1, -beta, -alpha, 1)
+            finally:
+                board.unmake()
+            if score > best:
+                best, best_cell = score, cell
+            alpha = max(alpha, score)
+        return best, best_cell
+
+
+def best_cell(board, seconds=1.0, max_depth=None):
+    """
+    Returns (cell, depth, nodes): the best cell for the player to move
+    found by iterative deepening within `seconds`, the depth of the last
+    search that finished, and the nodes searched. cell is None if the game
+    is over.
+    """
+    if board.terminal():
+        return None, 0, 0
+    search = Search(board, time.perf_counter() + seconds)
+    remaining = len(board.cells) - len(board.history)
+    max_depth = remaining if max_depth is None else min(max_depth, remaining)
+
+    # Until depth 1 finishes, fall back on the most promising move
+    cell, finished = board.ordered_actions()[0], 0
+    for depth in range(1, max_depth + 1):
+        try:
+            value, cell = search.root(depth, cell)
+        except Timeout:
+            break
+        finished = depth
+        if abs(value) >= WIN - len(board.cells):
+            # A forced win or loss: searching deeper will not change it
+            break
+    return cell, finished, search.nodes
+
+
+def best_action(board, k=3, seconds=1.0, max_depth=None):
+    """
+    Returns the best (i, j) action on a list-of-lists board with k in a row
+    to win, found within `seconds`, or None if the game is over.
+    """
+    position = Board.from_lists(board, k)
+    cell, _, _ = best_cell(position, seconds, max_depth)
+    return None if cell is None else divmod(cell, position.columns)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        usage="python mnk.py [--rows M] [--columns N] [--k K] [--seconds S]")
+    parser.add_argument("--rows", type=int, default=5)
+    parser.add_argument("--columns", type=int, default=5)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=1.0,
+                        help="time budget per move")
+    args = parser.parse_args()
+
+    # Play the engine against itself, printing each move
+    board = Board(args.rows, args.columns, args.k)
+    while not board.terminal():
+        mover = board.player()
+        cell, depth, nodes = best_cell(board, args.seconds)
+        board.make(cell)
+        print(f"{mover} plays {divmod(cell, board.columns)} "
+              f"(depth {depth}, {nodes} nodes)")
+    for row in board.to_lists():
+        print(" ".join(mark or "." for mark in row))
+    print(f"Game Over: {board.winner} wins." if board.winner
+          else "Game Over: Tie.")
+
+
+if __name__ == "__main__":
+    main()
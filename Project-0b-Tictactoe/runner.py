@@ -1,12 +1,19 @@
 import pygame
 import sys
 import time
+from concurrent.futures import ThreadPoolExecutor
 
 import tictactoe as ttt
 
 pygame.init()
 size = width, height = 600, 400
 
+# Frames drawn per second at most
+FPS = 60
+
+# Seconds to show "Computer thinking..." before the AI moves
+AI_DELAY = 0.5
+
 # Colors
 black = (0, 0, 0)
 white = (255, 255, 255)
@@ -17,15 +24,26 @@ mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
 moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
 
+clock = pygame.time.Clock()
+
+# AI moves are computed on a worker thread so the window keeps responding
+executor = ThreadPoolExecutor(max_workers=1)
+
 user = None
 board = ttt.initial_state()
-ai_turn = False
+ai_move = None
+ai_started = None
 
 while True:
 
+    # Position of this frame's left click, if any
+    click = None
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            executor.shutdown(wait=False, cancel_futures=True)
             sys.exit()
+        if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+            click = event.pos
 
     screen.fill(black)
 
@@ -54,14 +72,10 @@ while True:
         screen.blit(playO, playORect)
 
         # Check if button is clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if playXButton.collidepoint(mouse):
-                time.sleep(0.2)
+        if click is not None:
+            if playXButton.collidepoint(click):
                 user = ttt.X
-            elif playOButton.collidepoint(mouse):
-                time.sleep(0.2)
+            elif playOButton.collidepoint(click):
                 user = ttt.O
 
     else:
@@ -108,23 +122,21 @@ while True:
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Check for AI move, started in the background and applied once
+        # it is ready and has been shown as thinking for AI_DELAY
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
-            else:
-                ai_turn = True
+            if ai_move is None:
+                ai_move = executor.submit(ttt.minimax, board)
+                ai_started = time.monotonic()
+            elif ai_move.done() and time.monotonic() - ai_started >= AI_DELAY:
+                board = ttt.result(board, ai_move.result())
+                ai_move = None
 
         # Check for a user move
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1 and user == player and not game_over:
-            mouse = pygame.mouse.get_pos()
+        if click is not None and user == player and not game_over:
             for i in range(3):
                 for j in range(3):
-                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
+                    if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(click)):
                         board = ttt.result(board, (i, j))
 
         if game_over:
@@ -134,13 +146,10 @@ while True:
             againRect.center = againButton.center
             pygame.draw.rect(screen, white, againButton)
             screen.blit(again, againRect)
-            click, _, _ = pygame.mouse.get_pressed()
-            if click == 1:
-                mouse = pygame.mouse.get_pos()
-                if againButton.collidepoint(mouse):
-                    time.sleep(0.2)
-                    user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+            if click is not None and againButton.collidepoint(click):
+                user = None
+                board = ttt.initial_state()
+                ai_move = None
 
     pygame.display.flip()
+    clock.tick(FPS)
@@ -3,7 +3,6 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
 
 X = "X"
 O = "O"
@@ -56,7 +55,8 @@ def result(board, action):
     if board[i][j] is not EMPTY:
         raise ValueError("Cell already occupied.")
 
-    new_board = copy.deepcopy(board)
+    # Rows only hold strings and None, so copying each row is enough
+    new_board = [row[:] for row in board]
     new_board[i][j] = player(board)
     return new_board
 
@@ -103,52 +103,286 @@ def utility(board):
     return 0
 
 
-def minimax(board):
+def symmetry_permutations():
     """
-    Returns the optimal action for the current player on the board.
-    If the game is terminal, returns None.
-    Uses alpha-beta pruning for efficiency.
+    Returns the 8 rotations and reflections of the board as permutations
+    of cell indices 0-8 (cell (i, j) is 3 * i + j): position k of a
+    transformed board holds cell perm[k] of the original.
     """
-    if terminal(board):
+    transforms = [
+        lambda i, j: (i, j),
+        lambda i, j: (j, 2 - i),
+        lambda i, j: (2 - i, 2 - j),
+        lambda i, j: (2 - j, i),
+        lambda i, j: (i, 2 - j),
+        lambda i, j: (2 - i, j),
+        lambda i, j: (j, i),
+        lambda i, j: (2 - j, 2 - i)
+    ]
+    permutations = []
+    for transform in transforms:
+        perm = [0] * 9
+        for i in range(3):
+            for j in range(3):
+                ti, tj = transform(i, j)
+                perm[3 * ti + tj] = 3 * i + j
+        permutations.append(tuple(perm))
+    return permutations
+
+
+SYMMETRIES = symmetry_permutations()
+
+# Cell indices of the 3 rows, 3 columns and 2 diagonals
+LINES = ((0, 1, 2), (3, 4, 5), (6, 7, 8),
+         (0, 3, 6), (1, 4, 7), (2, 5, 8),
+         (0, 4, 8), (2, 4, 6))
+
+# Kinds of value stored in the transposition table
+EXACT, LOWER, UPPER = 0, 1, 2
+
+# Maps canonical board -> (value, kind, best cell on the canonical board)
+# for every position searched so far, kept for the life of the process
+transpositions = {}
+
+
+def canonical(cells):
+    """
+    Returns (key, perm): the smallest string encoding of a tuple of cells
+    over its 8 symmetries, and the permutation in SYMMETRIES that produces it.
+    """
+    cells = "".join(cell or "." for cell in cells)
+    return min(("".join(cells[k] for k in perm), perm) for perm in SYMMETRIES)
+
+
+def outcome(cells):
+    """
+    Returns the utility of a tuple of cells if the game is over, else None.
+    """
+    for a, b, c in LINES:
+        mark = cells[a]
+        if mark is not None and mark == cells[b] == cells[c]:
+            return 1 if mark == X else -1
+    return None if EMPTY in cells else 0
+
+
+def bound_kind(value, alpha, beta):
+    """
+    Returns how a value searched with the window (alpha, beta) may be
+    stored: UPPER if it fell to alpha, LOWER if it reached beta, else EXACT.
+    """
+    if value <= alpha:
+        return UPPER
+    if value >= beta:
+        return LOWER
+    return EXACT
+
+
+def settles(kind, value, alpha, beta):
+    """
+    Returns True if a stored value of a kind decides a search with the
+    window (alpha, beta) without searching again.
+    """
+    return (kind == EXACT
+            or (kind == LOWER and value >= beta)
+            or (kind == UPPER and value <= alpha))
+
+
+def probe(key, alpha, beta):
+    """
+    Returns the stored (value, cell) for a canonical board if it settles
+    the search within the alpha-beta window, otherwise None.
+    """
+    entry = transpositions.get(key)
+    if entry is None:
+        return None
+    value, kind, cell = entry
+    if settles(kind, value, alpha, beta):
+        return value, cell
+    return None
+
+
+def store(key, perm, value, cell, alpha, beta):
+    """
+    Records a searched value, as a bound if it fell outside the window.
+    """
+    kind = bound_kind(value, alpha, beta)
+    transpositions[key] = (value, kind, perm.index(cell))
+
+
+def max_value(cells, alpha, beta):
+    """
+    Returns (value, best cell) for X to move on a tuple of cells,
+    none of which has ended the game.
+    """
+    key, perm = canonical(cells)
+    entry = probe(key, alpha, beta)
+    if entry is not None:
+        return entry[0], perm[entry[1]]
+
+    v = -math.inf
+    best_cell = None
+    window = alpha, beta
+    for k in range(9):  # deterministic tie-breaking
+        if cells[k] is not EMPTY:
+            continue
+        child = cells[:k] + (X,) + cells[k + 1:]
+        score = outcome(child)
+        if score is None:
+            score, _ = min_value(child, alpha, beta)
+        if score > v:
+            v, best_cell = score, k
+        alpha = max(alpha, v)
+        if alpha >= beta:
+            break  # beta cut-off
+    store(key, perm, v, best_cell, *window)
+    return v, best_cell
+
+
+def min_value(cells, alpha, beta):
+    """
+    Returns (value, best cell) for O to move on a tuple of cells,
+    none of which has ended the game.
+    """
+    key, perm = canonical(cells)
+    entry = probe(key, alpha, beta)
+    if entry is not None:
+        return entry[0], perm[entry[1]]
+
+    v = math.inf
+    best_cell = None
+    window = alpha, beta
+    for k in range(9):
+        if cells[k] is not EMPTY:
+            continue
+        child = cells[:k] + (O,) + cells[k + 1:]
+        score = outcome(child)
+        if score is None:
+            score, _ = max_value(child, alpha, beta)
+        if score < v:
+            v, best_cell = score, k
+        beta = min(beta, v)
+        if alpha >= beta:
+            break  # alpha cut-off
+    store(key, perm, v, best_cell, *window)
+    return v, best_cell
+
+
+def search(board):
+    """
+    Returns the optimal action for the current player on the board,
+    or None if the game is terminal, by searching from the board.
+    Uses alpha-beta pruning for efficiency, and a transposition table
+    shared by every call, so positions equal up to rotation or reflection
+    are searched once per process.
+
+    The search runs on an immutable tuple of the 9 cells, and decides
+    whether each position has ended the game exactly once.
+    """
+    cells = tuple(cell for row in board for cell in row)
+    if outcome(cells) is not None:
         return None
 
     turn = player(board)
 
     # Optional: short-circuit if a winning move is immediately available
-    for a in actions(board):
-        if winner(result(board, a)) == turn:
-            return a
-
-    def max_value(state, alpha, beta):
-        if terminal(state):
-            return utility(state), None
-        v = -math.inf
-        best_action = None
-        for a in sorted(actions(state)):  # deterministic tie-breaking
-            score, _ = min_value(result(state, a), alpha, beta)
-            if score > v:
-                v, best_action = score, a
-            alpha = max(alpha, v)
-            if alpha >= beta:
-                break  # beta cut-off
-        return v, best_action
-
-    def min_value(state, alpha, beta):
-        if terminal(state):
-            return utility(state), None
-        v = math.inf
-        best_action = None
-        for a in sorted(actions(state)):
-            score, _ = max_value(result(state, a), alpha, beta)
-            if score < v:
-                v, best_action = score, a
-            beta = min(beta, v)
-            if alpha >= beta:
-                break  # alpha cut-off
-        return v, best_action
+    for i, j in actions(board):
+        k = 3 * i + j
+        for line in LINES:
+            if k in line and all(cells[c] == turn for c in line if c != k):
+                return i, j
 
     if turn == X:
-        _, act = max_value(board, -math.inf, math.inf)
+        _, k = max_value(cells, -math.inf, math.inf)
     else:
-        _, act = min_value(board, -math.inf, math.inf)
-    return act
+        _, k = min_value(cells, -math.inf, math.inf)
+    return divmod(k, 3)
+
+
+# Digit of each mark in a board's base-3 code: cell k adds digit * 3 ** k
+DIGITS = {EMPTY: 0, X: 1, O: 2}
+POWERS = tuple(3 ** k for k in range(9))
+
+# Solution table entry for codes of unreachable boards
+UNREACHABLE = 0xFF
+
+# Cell stored for boards with no move left
+NO_MOVE = 9
+
+
+def encode(board):
+    """
+    Returns the base-3 code of a board.
+    """
+    return sum(DIGITS[board[i][j]] * POWERS[3 * i + j]
+               for i in range(3) for j in range(3))
+
+
+def solve_all():
+    """
+    Retrograde-solves every reachable board, returning a table with one
+    byte per base-3 code: (value + 1) << 4 | best cell, where value is the
+    utility with best play, or UNREACHABLE.
+
+    Boards are grouped into layers by number of marks and solved from the
+    last layer back, so every child is solved before its parent. The best
+    cell wins soonest, or failing that loses latest, then comes first.
+    """
+    # Layers of reachable (code, cells) by number of marks
+    layers = [{0: (EMPTY,) * 9}]
+    for marks in range(9):
+        mark = X if marks % 2 == 0 else O
+        layer = {}
+        for code, cells in layers[-1].items():
+            if outcome(cells) is not None:
+                continue
+            for k in range(9):
+                if cells[k] is EMPTY:
+                    layer[code + DIGITS[mark] * POWERS[k]] = (
+                        cells[:k] + (mark,) + cells[k + 1:])
+        layers.append(layer)
+
+    table = bytearray([UNREACHABLE]) * 3 ** 9
+    # Maps code -> plies until the game ends with best play
+    plies = {}
+    for marks in range(9, -1, -1):
+        mark = X if marks % 2 == 0 else O
+        sign = 1 if mark == X else -1
+        for code, cells in layers[marks].items():
+            value = outcome(cells)
+            if value is not None:
+                table[code] = (value + 1) << 4 | NO_MOVE
+                plies[code] = 0
+                continue
+            best = None
+            for k in range(9):
+                if cells[k] is not EMPTY:
+                    continue
+                child = code + DIGITS[mark] * POWERS[k]
+                value = (table[child] >> 4) - 1
+                score = sign * value
+                length = plies[child] + 1
+                rank = (score, -length if score > 0 else length, -k)
+                if best is None or rank > best[0]:
+                    best = rank, value, k, length
+            _, value, k, length = best
+            table[code] = (value + 1) << 4 | k
+            plies[code] = length
+    return bytes(table)
+
+
+SOLUTION = solve_all()
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+    If the game is terminal, returns None.
+
+    Every reachable board is solved once, when this module is imported,
+    so this is a table lookup. Other boards fall back on search.
+    """
+    entry = SOLUTION[encode(board)]
+    if entry == UNREACHABLE:
+        return search(board)
+    cell = entry & 0xF
+    return None if cell == NO_MOVE else divmod(cell, 3)
@@ -15,6 +15,10 @@ class Sentence():
         """Returns a set of all symbols in the logical sentence."""
         return set()
 
+    def code(self, index):
+        """Returns Python code for the sentence, symbol index[name] as m<i>."""
+        raise Exception("nothing to compile")
+
     @classmethod
     def validate(cls, sentence):
         if not isinstance(sentence, Sentence):
@@ -68,6 +72,12 @@ class Symbol(Sentence):
     def symbols(self):
         return {self.name}
 
+    def code(self, index):
+        try:
+            return f"m{index[self.name]}"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
+
 
 class Not(Sentence):
     def __init__(self, operand):
@@ -92,6 +102,9 @@ class Not(Sentence):
     def symbols(self):
         return self.operand.symbols()
 
+    def code(self, index):
+        return f"(not {self.operand.code(index)})"
+
 
 class And(Sentence):
     def __init__(self, *conjuncts):
@@ -129,6 +142,12 @@ class And(Sentence):
     def symbols(self):
         return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
 
+    def code(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.code(index) for conjunct in self.conjuncts) + ")"
+
 
 class Or(Sentence):
     def __init__(self, *disjuncts):
@@ -160,6 +179,12 @@ class Or(Sentence):
     def symbols(self):
         return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
 
+    def code(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.code(index) for disjunct in self.disjuncts) + ")"
+
 
 class Implication(Sentence):
     def __init__(self, antecedent, consequent):
@@ -191,6 +216,11 @@ class Implication(Sentence):
     def symbols(self):
         return set.union(self.antecedent.symbols(), self.consequent.symbols())
 
+    def code(self, index):
+        antecedent = self.antecedent.code(index)
+        consequent = self.consequent.code(index)
+        return f"(not {antecedent} or {consequent})"
+
 
 class Biconditional(Sentence):
     def __init__(self, left, right):
@@ -224,40 +254,41 @@ class Biconditional(Sentence):
     def symbols(self):
         return set.union(self.left.symbols(), self.right.symbols())
 
+    def code(self, index):
+        return f"({self.left.code(index)} == {self.right.code(index)})"
 
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
 
-        # If model has an assignment for each symbol
-        if not symbols:
-
-            # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
-            return True
-        else:
+def compile_sentence(sentence, symbols):
+    """
+    Compiles a sentence into a function that takes one truth value per
+    symbol, in the order of `symbols`, and returns whether the sentence
+    holds in that model.
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
+    Sentences nested too deeply for the Python compiler (a few hundred
+    levels) fall back to a function that calls sentence.evaluate.
+    """
+    index = {name: i for i, name in enumerate(symbols)}
+    variables = ", ".join(f"m{i}" for i in range(len(symbols)))
+    try:
+        return eval(f"lambda {variables}: {sentence.code(index)}")
+    except (SyntaxError, RecursionError, MemoryError):
+        def holds(*values):
+            return sentence.evaluate(dict(zip(symbols, values)))
+        return holds
 
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
 
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
-
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+def model_check(knowledge, query):
+    """Checks if knowledge base entails query."""
 
     # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+
+    # Compile both sentences once instead of walking their trees per model
+    knowledge_holds = compile_sentence(knowledge, symbols)
+    query_holds = compile_sentence(query, symbols)
 
-    # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    # Knowledge entails query if query is true in every model of knowledge
+    for model in itertools.product((True, False), repeat=len(symbols)):
+        if knowledge_holds(*model) and not query_holds(*model):
+            return False
+    return True